@@ -0,0 +1,79 @@
+"""
+Microbenchmark of the entity properties Home Assistant reads between polls.
+
+Every property is timed as cached now, and as it was computed before the
+caching: a new DeviceInfo and a new attribute dict on every read.
+
+Run from the repository root with Home Assistant installed:
+
+    python benchmarks/bench_entity_properties.py [thermostats]
+"""
+import asyncio
+import sys
+import timeit
+
+from homeassistant.helpers.entity import DeviceInfo
+
+from custom_components.salus_it500.binary_sensor import SalusCH1heatOnOff
+from custom_components.salus_it500.climate import SalusThermostat
+from custom_components.salus_it500.sensor import SalusTemperatureSensor
+
+READS = 100
+
+
+async def main(count):
+    """Time device_info and extra_state_attributes reads on `count` thermostats, uncached and cached."""
+    thermostats = [
+        SalusThermostat(
+            email="user@example.com",
+            password="secret",
+            name=f"bench {index}",
+            device_id=f"dev{index}",
+            raw_attributes=True,
+        )
+        for index in range(count)
+    ]
+    children = [SalusTemperatureSensor(t) for t in thermostats]
+    children += [SalusCH1heatOnOff(t) for t in thermostats]
+
+    def read_thermostats():
+        for thermostat in thermostats:
+            thermostat.device_info
+            thermostat.extra_state_attributes
+
+    def read_thermostats_uncached():
+        for thermostat in thermostats:
+            DeviceInfo(identifiers={(thermostat.unique_id,)}, name=thermostat.name)
+            thermostat._build_state_attributes()
+
+    def read_children():
+        for child in children:
+            child.device_info
+
+    def read_children_uncached():
+        # Child entities asked their thermostat, which built a new DeviceInfo
+        for child in children:
+            thermostat = child._thermostat
+            DeviceInfo(identifiers={(thermostat.unique_id,)}, name=thermostat.name)
+
+    for label, uncached, cached, entities in (
+        (
+            "thermostat device_info + extra_state_attributes",
+            read_thermostats_uncached,
+            read_thermostats,
+            len(thermostats),
+        ),
+        ("child entity device_info", read_children_uncached, read_children, len(children)),
+    ):
+        before, after = (
+            min(timeit.repeat(func, number=READS, repeat=5)) / READS / entities * 1e9
+            for func in (uncached, cached)
+        )
+        print(
+            f"{label} ({entities} entities): {before:.0f} ns uncached, "
+            f"{after:.0f} ns cached per entity read, {before / after:.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
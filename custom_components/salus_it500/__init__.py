@@ -17,18 +17,24 @@ CONF_USERNAME = "username"
 CONF_PASSWORD = "password"
 CONF_NAME = "name"
 CONF_DEVICEID = "device_id"
+CONF_RAW_ATTRIBUTES = "raw_attributes"
+CONF_ZONE2 = "zone2"
+
+# Define the configuration schema; one or more thermostats
+DEVICE_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_USERNAME): cv.string,
+        vol.Required(CONF_PASSWORD): cv.string,
+        vol.Required(CONF_NAME): cv.string,                
+        vol.Required(CONF_DEVICEID): cv.string,
+        vol.Optional(CONF_RAW_ATTRIBUTES, default=False): cv.boolean,
+        vol.Optional(CONF_ZONE2, default=False): cv.boolean,
+    }
+)
 
-# Define the configuration schema
 CONFIG_SCHEMA = vol.Schema(
     {
-        DOMAIN: vol.Schema(
-            {
-                vol.Required(CONF_USERNAME): cv.string,
-                vol.Required(CONF_PASSWORD): cv.string,
-                vol.Required(CONF_NAME): cv.string,                
-                vol.Required(CONF_DEVICEID): cv.string,
-            }
-        )
+        DOMAIN: vol.All(cv.ensure_list, [DEVICE_SCHEMA])
     },
     extra=vol.ALLOW_EXTRA,
 )
@@ -36,36 +42,30 @@ CONFIG_SCHEMA = vol.Schema(
 async def async_setup(hass: HomeAssistant, config: dict):
     """Set up the Salus iT500 integration from configuration.yaml."""
     # Extract the configuration
-    conf = config.get(DOMAIN)
-    if conf is None:
+    devices = config.get(DOMAIN)
+    if devices is None:
         _LOGGER.error("Salus iT500 configuration not found in configuration.yaml")
         return False
 
-    # Retrieve username, password, and name
-    username = conf[CONF_USERNAME]
-    password = conf[CONF_PASSWORD]
-    name = conf[CONF_NAME]
-    device_id = conf[CONF_DEVICEID]
-
-    _LOGGER.debug("Setting up Salus iT500 with username: %s, name: %s, device_id: %s", username, name, device_id)
-
-    # Create an instance of the climate integration from the file
-    # Assuming that you will import the climate integration from the file you've provided
     hass.data[DOMAIN] = {
-        "username": username,
-        "password": password,
-        "name": name,
-        "device_id": device_id,
-        # You can initialize the integration here, e.g.:
-        # "client": SalusIT500(username, password, name),
+        "config": config,
+        "thermostats": [],
+        # Token managers (and their aiohttp sessions) per account
+        "accounts": {},
     }
 
-    # Forward the device setup to the climate platform
-    hass.async_create_task(
-        discovery.async_load_platform(
-            hass, "climate", DOMAIN, {"device_id": device_id}, config
+    for conf in devices:
+        _LOGGER.debug(
+            "Setting up Salus iT500 with username: %s, name: %s, device_id: %s",
+            conf[CONF_USERNAME], conf[CONF_NAME], conf[CONF_DEVICEID],
+        )
+
+        # Forward the device setup to the climate platform
+        hass.async_create_task(
+            discovery.async_load_platform(
+                hass, "climate", DOMAIN, dict(conf), config
+            )
         )
-    )
 
     # Any other setup logic goes here
 
@@ -0,0 +1,202 @@
+"""
+Session token management of a Salus account.
+"""
+import asyncio
+import logging
+import re
+import time
+
+from homeassistant.helpers.event import async_track_time_interval
+
+from .capture import ResponseCapture
+from .const import (
+    CLIENT_TIMEOUT,
+    LOGIN_BUDGET,
+    TOKEN_CHECK_INTERVAL,
+    TOKEN_REFRESH_AFTER,
+    URL_GET_TOKEN,
+    URL_LOGIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'<input id="token" type="hidden" value="(.*)" />')
+
+
+async def async_request(session, capture, method, url, params=None, data=None, secrets=()):
+    """Send one request to the Salus cloud and capture the exchange."""
+    headers = {"content-type": "application/x-www-form-urlencoded"} if data is not None else None
+    try:
+        async with session.request(
+            method, url, params=params, data=data, headers=headers, timeout=CLIENT_TIMEOUT
+        ) as response:
+            text = await response.text()
+    except Exception as e:
+        capture.record(method, url, params, data, error=repr(e), secrets=secrets)
+        raise
+
+    capture.record(method, url, params, data, status=response.status, body=text, secrets=secrets)
+    return response.status, text
+
+
+REJECTED_STATUSES = (401, 403)
+# Field of the login form, served instead of JSON once the session expired
+LOGIN_FORM_MARKER = "IDemail"
+
+
+def is_rejected(status, text):
+    """Return True when a response shows that the session token was refused."""
+    if status in REJECTED_STATUSES:
+        return True
+    # Other HTML, such as a PHP notice, is not a refusal
+    return status == 200 and LOGIN_FORM_MARKER in (text or "")
+
+
+class SalusAuth:
+    """Keep the session tokens of one account fresh in the background.
+
+    Polls and commands only read the current token; logins run ahead of
+    expiry from a timer, or in the background once Salus refuses a token,
+    and the new tokens replace the old ones in one assignment. A refused
+    token is dropped at once, so nothing sends it again.
+    """
+
+    def __init__(self, session, username, password):
+        """Initialize the token manager."""
+        self.session = session
+        self._username = username
+        self._password = password
+        self._device_ids = []
+        self._tokens = {}
+        self._refreshed_at = None
+        self._lock = asyncio.Lock()
+        self._capture = ResponseCapture()
+        self._hass = None
+        self._cancel_check = None
+
+    @property
+    def secrets(self):
+        """Return the values that must never leave the integration."""
+        return (self._username, self._password, *self._tokens.values())
+
+    def add_device(self, device_id):
+        """Fetch tokens for this device from now on."""
+        if device_id not in self._device_ids:
+            self._device_ids.append(device_id)
+
+    def token(self, device_id):
+        """Return the current token of a device, or None."""
+        return self._tokens.get(device_id)
+
+    def dump_capture(self):
+        """Return the last captured login requests, with secrets redacted."""
+        return self._capture.dump()
+
+    def clear_capture(self):
+        """Drop the captured login requests."""
+        self._capture.clear()
+
+    async def async_get_token(self, device_id):
+        """Return the token of a device, logging in only if there is none yet."""
+        token = self._tokens.get(device_id)
+        if token is None:
+            await self.async_refresh()
+            token = self._tokens.get(device_id)
+        return token
+
+    def async_invalidate(self, token):
+        """Drop `token` after Salus refused it and renew the tokens in the background."""
+        if token is not None:
+            if token not in self._tokens.values():
+                # Already replaced by a newer refresh
+                return
+            self._tokens = {
+                device_id: value for device_id, value in self._tokens.items() if value != token
+            }
+        self._refreshed_at = None
+        if self._hass is not None and not self._lock.locked():
+            self._hass.async_create_background_task(
+                self.async_refresh(), f"salus_it500 token refresh {self._username}"
+            )
+
+    async def async_refresh(self):
+        """Log in and replace the tokens of all devices of the account."""
+        if self._lock.locked():
+            # Another caller is already logging in, share its result
+            async with self._lock:
+                return
+        async with self._lock:
+            try:
+                # Login and token scrape share one budget
+                async with asyncio.timeout(LOGIN_BUDGET):
+                    tokens = await self._async_login()
+            except TimeoutError:
+                _LOGGER.error("Login to Salus iT500 timed out")
+                return
+            except Exception as e:
+                _LOGGER.error("Unexpected error while getting the token: %s", e)
+                return
+
+            if tokens:
+                self._tokens = {**self._tokens, **tokens}
+                self._refreshed_at = time.monotonic()
+
+    async def _async_login(self):
+        """Log in and scrape the session token of every device."""
+        payload = {
+            "IDemail": self._username,
+            "password": self._password,
+            "login": "Login",
+            "keep_logged_in": "1",
+        }
+        _LOGGER.debug("get_token --url_login: %s", URL_LOGIN)
+        status, _ = await async_request(
+            self.session, self._capture, "POST", URL_LOGIN, data=payload, secrets=self.secrets
+        )
+        if status != 200:
+            _LOGGER.error("Failed to login to Salus iT500. HTTP status code: %s", status)
+            return {}
+        _LOGGER.debug("Login successful. Proceeding to fetch the token.")
+
+        tokens = {}
+        for device_id in self._device_ids:
+            token_status, token_text = await async_request(
+                self.session, self._capture, "GET", URL_GET_TOKEN,
+                params={"devId": device_id}, secrets=self.secrets,
+            )
+            if token_status != 200:
+                _LOGGER.error("Failed to fetch the token. HTTP status code: %s", token_status)
+                continue
+
+            result = TOKEN_PATTERN.search(token_text or "")
+            if result:
+                tokens[device_id] = result.group(1)
+                _LOGGER.debug("Successfully retrieved the token.")
+            else:
+                _LOGGER.error("Token not found in the response. Check the HTML structure.")
+        return tokens
+
+    def async_start(self, hass):
+        """Check the token age periodically and renew it ahead of expiry."""
+        self._hass = hass
+        if self._cancel_check is None:
+            self._cancel_check = async_track_time_interval(
+                hass, self._async_check, TOKEN_CHECK_INTERVAL
+            )
+
+    async def async_stop(self, _event=None):
+        """Stop the background renewal and close the shared session."""
+        if self._cancel_check is not None:
+            self._cancel_check()
+            self._cancel_check = None
+        await self.session.close()
+
+    async def _async_check(self, _now):
+        """Renew the tokens once they are old enough."""
+        if not self._device_ids:
+            return
+        if (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= TOKEN_REFRESH_AFTER.total_seconds()
+        ):
+            await self.async_refresh()
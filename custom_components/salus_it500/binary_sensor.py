@@ -0,0 +1,125 @@
+"""
+Optional binary sensors of the Salus iT500 thermostat.
+"""
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+from homeassistant.components.binary_sensor import BinarySensorEntity
+
+from .entity import SalusThermostatChildEntity, get_thermostat
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+    """Set up the Salus iT500 binary sensor platform."""
+    if discovery_info is None:
+        return
+    thermostat = get_thermostat(hass, discovery_info["device_id"])
+
+    async_add_entities(
+        [
+            SalusOnlineBinarySensor(thermostat),
+            SalusCH1autoOff(thermostat),
+            SalusCH1manual(thermostat),
+            SalusCH1schedType(thermostat),
+            SalusCH1heatOnOffStatus(thermostat),
+            SalusCH1autoMode(thermostat),
+            SalusCH1heatOnOff(thermostat),
+            SalusCH1frostActive(thermostat),
+        ]
+    )
+
+
+class SalusOnlineBinarySensor(SalusThermostatChildEntity, BinarySensorEntity):
+    """Representation of a Online Status."""
+
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+
+    def __init__(self, thermostat):
+        """Initialize the binary sensor."""
+        super().__init__(thermostat, "online_status", "Online Status")
+
+    @property
+    def is_on(self):
+        return self._thermostat._online
+
+
+class SalusCH1autoOff(SalusThermostatChildEntity, BinarySensorEntity):
+    """Representation of a CH1autoOff."""
+
+    def __init__(self, thermostat):
+        """Initialize the binary sensor."""
+        super().__init__(thermostat, "CH1autoOff", "CH1autoOff")
+
+    @property
+    def is_on(self):
+        return self._thermostat._CH1autoOff == "1"
+
+
+class SalusCH1manual(SalusThermostatChildEntity, BinarySensorEntity):
+    """Representation of a CH1manual."""
+
+    def __init__(self, thermostat):
+        """Initialize the binary sensor."""
+        super().__init__(thermostat, "CH1manual", "CH1manual")
+
+    @property
+    def is_on(self):
+        return self._thermostat._CH1manual == "1"
+
+
+class SalusCH1schedType(SalusThermostatChildEntity, BinarySensorEntity):
+    """Representation of a CH1schedType."""
+
+    def __init__(self, thermostat):
+        """Initialize the binary sensor."""
+        super().__init__(thermostat, "CH1schedType", "CH1schedType")
+
+    @property
+    def is_on(self):
+        return self._thermostat._CH1schedType == "1"
+
+
+class SalusCH1heatOnOffStatus(SalusThermostatChildEntity, BinarySensorEntity):
+    """Representation of a CH1heatOnOffStatus."""
+
+    def __init__(self, thermostat):
+        """Initialize the binary sensor."""
+        super().__init__(thermostat, "CH1heatOnOffStatus", "CH1heatOnOffStatus")
+
+    @property
+    def is_on(self):
+        return self._thermostat._CH1heatOnOffStatus == "1"
+
+
+class SalusCH1autoMode(SalusThermostatChildEntity, BinarySensorEntity):
+    """Representation of a CH1autoMode."""
+
+    def __init__(self, thermostat):
+        """Initialize the binary sensor."""
+        super().__init__(thermostat, "CH1autoMode", "CH1autoMode")
+
+    @property
+    def is_on(self):
+        return self._thermostat._CH1autoMode == "1"
+
+
+class SalusCH1heatOnOff(SalusThermostatChildEntity, BinarySensorEntity):
+    """Representation of a CH1heatOnOff."""
+
+    def __init__(self, thermostat):
+        """Initialize the binary sensor."""
+        super().__init__(thermostat, "CH1heatOnOff", "CH1heatOnOff")
+
+    @property
+    def is_on(self):
+        return self._thermostat._CH1heatOnOff == "1"
+
+
+class SalusCH1frostActive(SalusThermostatChildEntity, BinarySensorEntity):
+    """Representation of a CH1frostActive."""
+
+    def __init__(self, thermostat):
+        """Initialize the binary sensor."""
+        super().__init__(thermostat, "CH1frostActive", "CH1frostActive")
+
+    @property
+    def is_on(self):
+        return self._thermostat._CH1frostActive == "1"
@@ -0,0 +1,251 @@
+"""
+Estimate of how often, and when, the Salus cloud refreshes a device's values.
+"""
+import math
+import statistics
+from collections import deque
+
+# Refresh windows kept for the estimate, and how many are needed before
+# polls are aligned to it
+CADENCE_WINDOWS = 12
+CADENCE_MIN_WINDOWS = 4
+# Polls land this long after the predicted refresh, and are repeated this
+# soon when the refresh was not there yet
+CADENCE_MARGIN = 5
+CADENCE_RETRY = 15
+# At most this share of the polls is spent on such repeats
+CADENCE_RETRY_SHARE = 0.1
+# A gap fits a period when it is within this share of the period from one of
+# its multiples; this share of the gaps must fit
+CADENCE_TOLERANCE = 0.2
+CADENCE_FIT_SHARE = 0.75
+MIN_PERIOD = 10
+# Polls are only aligned when the period holds this many intervals
+CADENCE_MIN_STEPS = 2
+
+
+class CadenceEstimator:
+    """Track when the response of a device changes and derive period and phase.
+
+    A change seen by a poll means the cloud refreshed somewhere between the
+    previous poll and this one; each such window bounds one refresh time.
+    Most refreshes return identical values, so two windows may be any
+    number of periods apart. Times are POSIX timestamps.
+    """
+
+    def __init__(self):
+        """Initialize the estimator."""
+        self._windows = deque(maxlen=CADENCE_WINDOWS)
+        self._last_poll = None
+        self._last_digest = None
+        self._planned_refresh = None
+        self._missed = False
+        # A planned poll found no new values; the next change shows whether
+        # the refresh was only late
+        self._late = False
+        # A command of ours was accepted and its change has not been seen yet
+        self._commanded = False
+        # Whether each recent poll planned after a refresh saw new values,
+        # and whether each recent delay was a retry
+        self._planned_changes = deque(maxlen=CADENCE_WINDOWS)
+        self._retries = deque(maxlen=CADENCE_WINDOWS)
+        self.period = None
+        self.earliest = None
+        self.anchor = None
+
+    def command_sent(self):
+        """Note that a command was accepted, so the next change is not a refresh."""
+        self._commanded = True
+
+    def observe(self, polled_at, digest):
+        """Record one poll and the digest of the response it returned.
+
+        The first change after command_sent() is caused by the command and
+        bounds no refresh.
+        """
+        planned = self._planned_refresh
+        if planned is not None and polled_at < planned:
+            # An unplanned poll (command, schedule) before the refresh
+            planned = None
+        changed = self._last_digest is not None and digest != self._last_digest
+        if changed and self._commanded:
+            # Neither a refresh window nor the outcome of a planned poll
+            self._commanded = False
+            self._planned_refresh = None
+            self._missed = self._late = False
+            self._last_poll = polled_at
+            self._last_digest = digest
+            return
+
+        if changed:
+            self._windows.append((self._last_poll, polled_at))
+            self._estimate()
+            if self._late and self._planned_changes:
+                # The planned poll was early, the refresh did change the values
+                self._planned_changes[-1] = True
+        # Unchanged values only show a missed refresh when every recent
+        # refresh changed them
+        self._missed = planned is not None and not changed and self.every_refresh_changes
+        self._late = planned is not None and not changed
+        if planned is not None:
+            self._planned_changes.append(changed)
+            self._planned_refresh = None
+        self._last_poll = polled_at
+        self._last_digest = digest
+
+    @property
+    def ready(self):
+        """Return True once the estimate is good enough to schedule polls."""
+        return self.period is not None and len(self._windows) >= CADENCE_MIN_WINDOWS
+
+    @property
+    def window_count(self):
+        """Return how many refresh windows the estimate is based on."""
+        return len(self._windows)
+
+    @property
+    def every_refresh_changes(self):
+        """Return True when every recent poll planned after a refresh saw new values."""
+        return len(self._planned_changes) >= CADENCE_MIN_WINDOWS and all(self._planned_changes)
+
+    def next_refresh(self, after):
+        """Return the first predicted refresh time after `after`."""
+        if self.period is None:
+            return None
+        cycles = (after - self.anchor) // self.period + 1
+        return self.anchor + cycles * self.period
+
+    def poll_delay(self, now, interval):
+        """Return the delay of the next poll, keeping about `interval` between polls.
+
+        When the cloud refreshes more often than every two intervals, change
+        windows cannot place a refresh and `interval` is returned as is.
+        Otherwise the period is split into as many steps as fit without being
+        shorter than `interval`, and one step starts just after each refresh.
+        A planned poll that found no new values is repeated after
+        CADENCE_RETRY only when every recent refresh brought new values, and
+        for at most CADENCE_RETRY_SHARE of the polls.
+        """
+        if self._missed and sum(self._retries) + 1 <= CADENCE_RETRY_SHARE * CADENCE_WINDOWS:
+            # The predicted refresh was not there yet, look again shortly
+            self._missed = False
+            self._retries.append(True)
+            return CADENCE_RETRY
+        self._retries.append(False)
+
+        if self.period < CADENCE_MIN_STEPS * interval:
+            # Windows as wide as the period cannot tell the refreshes apart
+            return interval
+        steps = int(self.period // interval)
+        step = self.period / steps
+
+        # Aim at the middle of the phase still possible: a poll before the
+        # refresh narrows it from below, one after it from above
+        base = (self.earliest + self.anchor) / 2 + CADENCE_MARGIN
+        # The next time on the grid base + n * step, at least half a step
+        # away so an unplanned poll does not add another
+        n = math.floor((now + step / 2 - base) / step) + 1
+        poll_at = base + n * step
+        self._planned_refresh = poll_at - CADENCE_MARGIN if n % steps == 0 else None
+        return poll_at - now
+
+    def as_dict(self):
+        """Return the estimate for diagnostics."""
+        return {
+            "period": self.period,
+            "anchor": self.anchor,
+            "windows": self.window_count,
+            "ready": self.ready,
+            "every_refresh_changes": self.every_refresh_changes,
+        }
+
+    def _estimate(self):
+        """Re-estimate period and phase from the recorded windows."""
+        if len(self._windows) < 2:
+            return
+        centers = [(start + end) / 2 for start, end in self._windows]
+        gaps = sorted(b - a for a, b in zip(centers, centers[1:]) if b - a >= MIN_PERIOD)
+
+        # Every gap spans a whole number of periods: the period is the
+        # smallest gap the other gaps are multiples of
+        for candidate in gaps:
+            period = _fit_period(gaps, candidate)
+            if period is not None:
+                break
+        else:
+            return
+
+        # Shifted by whole periods, every window bounds the same phase; their
+        # intersection pins it. The period is refined to the one leaving the
+        # widest intersection, and a window that overlaps none of the others
+        # is an outlier (a change caused by a command) and is ignored.
+        windows = list(self._windows)
+        period = max(MIN_PERIOD, period)
+        cycles = [round((centers[-1] - center) / period) for center in centers]
+        for skip in (None, *range(len(windows) - 1)):
+            kept = [
+                (window, cycle)
+                for index, (window, cycle) in enumerate(zip(windows, cycles))
+                if index != skip
+            ]
+            refined, (start, end) = _refine_period(kept, period)
+            if start <= end:
+                # The anchor is the latest possible refresh time
+                self.period = refined
+                self.earliest, self.anchor = start, end
+                return
+
+
+def _fit_period(gaps, candidate):
+    """Return the period refined from the gaps that fit `candidate`, or None.
+
+    The gaps are folded smallest first, so each fold refines the period the
+    larger multiples are folded onto. `candidate` is rejected when too few
+    gaps fit, or when the other fitting gaps are all multiples of a common
+    factor, which means `candidate` is a fraction of the real period.
+    """
+    folded = []
+    multiples = []
+    period = candidate
+    for gap in gaps:
+        multiple = max(1, round(gap / period))
+        if abs(gap - multiple * period) > CADENCE_TOLERANCE * period:
+            continue
+        folded.append(gap / multiple)
+        multiples.append(multiple)
+        period = statistics.median(folded)
+
+    if len(folded) < CADENCE_FIT_SHARE * len(gaps):
+        return None
+    # The candidate itself fits once, the others must confirm it
+    if 1 in multiples:
+        multiples.remove(1)
+    if not multiples or math.gcd(*multiples) != 1:
+        return None
+    return period
+
+
+def _phase_bounds(windows, period):
+    """Return the refresh time bounds in the latest window for (window, cycles back) pairs."""
+    start = max(window_start + cycles * period for (window_start, _), cycles in windows)
+    end = min(window_end + cycles * period for (_, window_end), cycles in windows)
+    return start, end
+
+
+def _refine_period(windows, period):
+    """Return the period near `period` leaving the widest phase bounds, and those bounds.
+
+    The width of the bounds is concave in the period, so a ternary search
+    finds its maximum. The bounds are empty when no period fits.
+    """
+    lower, upper = period * (1 - CADENCE_TOLERANCE / 4), period * (1 + CADENCE_TOLERANCE / 4)
+    for _ in range(40):
+        left, right = lower + (upper - lower) / 3, upper - (upper - lower) / 3
+        left_start, left_end = _phase_bounds(windows, left)
+        right_start, right_end = _phase_bounds(windows, right)
+        if left_end - left_start < right_end - right_start:
+            lower = left
+        else:
+            upper = right
+    period = (lower + upper) / 2
+    return period, _phase_bounds(windows, period)
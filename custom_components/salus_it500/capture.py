@@ -0,0 +1,84 @@
+"""
+Bounded capture of the raw Salus cloud traffic, used for diagnostics.
+"""
+import re
+import time
+from collections import deque
+
+DEFAULT_CAPTURE_SIZE = 20
+MAX_BODY_LENGTH = 4096
+DEBUG_SAMPLE_RATE = 10
+
+REDACTED = "**REDACTED**"
+SENSITIVE_KEYS = ("IDemail", "password", "token")
+
+# The control.php page carries the session token in a hidden input
+TOKEN_INPUT_PATTERN = re.compile(r'(<input id="token" type="hidden" value=")(.*?)(" />)')
+
+
+def redact(values):
+    """Return a copy of a params/payload dict with credentials and tokens hidden."""
+    if not values:
+        return values
+    return {
+        key: REDACTED if key in SENSITIVE_KEYS else value
+        for key, value in values.items()
+    }
+
+
+def redact_body(body, secrets=()):
+    """Hide the session token and any known secret in a response body."""
+    body = TOKEN_INPUT_PATTERN.sub(r"\1" + REDACTED + r"\3", body)
+    for secret in secrets:
+        if secret:
+            body = body.replace(secret, REDACTED)
+    if len(body) > MAX_BODY_LENGTH:
+        body = body[:MAX_BODY_LENGTH] + "...(truncated)"
+    return body
+
+
+class ResponseCapture:
+    """Keep the last N request/response pairs of a single device."""
+
+    def __init__(self, size=DEFAULT_CAPTURE_SIZE):
+        """Initialize the capture buffer."""
+        self._entries = deque(maxlen=size)
+
+    def record(self, method, url, params=None, data=None, status=None, body=None, error=None, secrets=()):
+        """Store one exchange, redacting credentials and tokens."""
+        self._entries.append(
+            {
+                "time": time.time(),
+                "method": method,
+                "url": url,
+                "params": redact(params),
+                "data": redact(data),
+                "status": status,
+                "body": redact_body(body, secrets) if body is not None else None,
+                # Exception reprs may quote the request URL and its token
+                "error": redact_body(error, secrets) if error is not None else None,
+            }
+        )
+
+    def dump(self):
+        """Return the captured exchanges, oldest first."""
+        return list(self._entries)
+
+    def clear(self):
+        """Drop all captured exchanges."""
+        self._entries.clear()
+
+
+class LogSampler:
+    """Let through only every n-th occurrence of a noisy log line."""
+
+    def __init__(self, every=DEBUG_SAMPLE_RATE):
+        """Initialize the sampler."""
+        self._every = every
+        self._count = 0
+
+    def sample(self):
+        """Return True when the current occurrence should be logged."""
+        should_log = self._count % self._every == 0
+        self._count += 1
+        return should_log
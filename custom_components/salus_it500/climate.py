@@ -4,36 +4,69 @@ Adds support for the Salus Thermostat units.
 import datetime
 import time
 import logging
-import re
 import requests
 import json
 import asyncio
 import aiohttp
-
+from types import MappingProxyType
+import voluptuous as vol
+
+from homeassistant.core import SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP, Platform
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers import discovery
 from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.event import async_call_later, async_track_point_in_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from homeassistant.const import ATTR_ENTITY_ID
 from homeassistant.const import ATTR_TEMPERATURE
 from homeassistant.const import UnitOfTemperature
 
 from homeassistant.components.climate import ClimateEntity
-from homeassistant.components.sensor import SensorEntity
-from homeassistant.components.binary_sensor import BinarySensorEntity
 from homeassistant.components.climate import ClimateEntityFeature
-from homeassistant.components.climate.const import HVACMode
+from homeassistant.components.climate.const import ATTR_HVAC_MODE, HVACMode
+
+from . import DOMAIN
+from .auth import REJECTED_STATUSES, SalusAuth, async_request, is_rejected
+from .cadence import CadenceEstimator
+from .capture import ResponseCapture, LogSampler
+from .const import CLIENT_TIMEOUT, POLL_WATCHDOG, URL_GET_DATA, URL_SET_DATA
+from .entity import SalusThermostatChildEntity
+from .schedule import ScheduleMirror
 
 # Add new constants for additional features
 SUPPORT_PRESETS = ["schedule", "manual", "holiday"]
 SUPPORT_HVAC_MODES = [HVACMode.AUTO, HVACMode.HEAT, HVACMode.OFF]
+# Operation mode reported right after a successful HVAC mode command
+OPERATION_MODES = {HVACMode.AUTO: "AUTO", HVACMode.HEAT: "MAN", HVACMode.OFF: "OFF"}
 SUPPORT_HOLIDAY_MODE = "holiday"
 SUPPORT_SCHEDULE_PROGRAM = "schedule_program"
 FROST_PROTECTION_MODE = "frost_protection"
 
-URL_LOGIN = "https://salus-it500.com/public/login.php"
-URL_GET_TOKEN = "https://salus-it500.com/public/control.php"
-URL_GET_DATA = "https://salus-it500.com/public/ajax_device_values.php"
-URL_SET_DATA = "https://salus-it500.com/includes/set.php"
-
 DEFAULT_NAME = "Salus Thermostat"
 
+SCAN_INTERVAL = datetime.timedelta(seconds=60)
+# Base rate in AUTO once the program is known, and how long after a
+# predicted transition the confirming poll runs on top of the cloud
+# refresh period
+AUTO_SCAN_INTERVAL = datetime.timedelta(minutes=15)
+TRANSITION_GRACE = datetime.timedelta(seconds=60)
+# How long a command is retried until a poll confirms it
+RECONCILE_TIMEOUT = datetime.timedelta(seconds=90)
+RECONCILE_RETRY_DELAY = datetime.timedelta(seconds=15)
+COMMAND_STORAGE_VERSION = 1
+COMMAND_SAVE_DELAY = 1
+# Queued commands older than this are stale and dropped; a failed replay is
+# repeated with a doubling delay, and given up after REPLAY_MAX_ATTEMPTS
+COMMAND_TTL = datetime.timedelta(hours=1)
+REPLAY_MAX_ATTEMPTS = 5
+REPLAY_BACKOFF = datetime.timedelta(seconds=30)
+REPLAY_MAX_BACKOFF = datetime.timedelta(minutes=15)
+SCHEDULE_STORAGE_VERSION = 1
+SCHEDULE_SAVE_DELAY = 60
+
 CONF_NAME = "name"
 MIN_TEMP = 5
 MAX_TEMP = 34.5
@@ -45,6 +78,68 @@ SUPPORT_FLAGS = (
 )
 SUPPORT_PRESET = ["schedule", "manual", "holiday"]
 
+# Events fired on edges between two consecutive polls
+EVENT_HEATING_CHANGED = f"{DOMAIN}_heating_changed"
+EVENT_HVAC_MODE_CHANGED = f"{DOMAIN}_hvac_mode_changed"
+EVENT_FROST_PROTECTION_CHANGED = f"{DOMAIN}_frost_protection_changed"
+EVENT_ONLINE_CHANGED = f"{DOMAIN}_online_changed"
+
+# Device flags only exposed as state attributes when raw_attributes is enabled
+RAW_ATTRIBUTES = (
+    "online",
+    "CH1autoOff",
+    "CH1manual",
+    "CH1schedType",
+    "CH1heatOnOffStatus",
+    "CH1autoMode",
+    "CH1heatOnOff",
+    "CH1frostActive",
+)
+
+SERVICE_DUMP_CAPTURE = "dump_capture"
+DUMP_CAPTURE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Optional("clear", default=False): cv.boolean,
+    }
+)
+
+SERVICE_SET_GROUP = "set_group"
+SET_GROUP_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+            vol.Optional(ATTR_HVAC_MODE): vol.In(SUPPORT_HVAC_MODES),
+            vol.Optional(ATTR_TEMPERATURE): vol.All(
+                vol.Coerce(float), vol.Range(min=MIN_TEMP, max=MAX_TEMP)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_HVAC_MODE, ATTR_TEMPERATURE),
+)
+# set.php commands in flight per account during a group command
+GROUP_PARALLELISM = 4
+
+SERVICE_SET_CONFIRMED = "set_confirmed"
+SET_CONFIRMED_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+            vol.Optional(ATTR_HVAC_MODE): vol.In(SUPPORT_HVAC_MODES),
+            vol.Optional(ATTR_TEMPERATURE): vol.All(
+                vol.Coerce(float), vol.Range(min=MIN_TEMP, max=MAX_TEMP)
+            ),
+            vol.Optional("timeout", default=60): vol.All(
+                vol.Coerce(int), vol.Range(min=5, max=300)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_HVAC_MODE, ATTR_TEMPERATURE),
+)
+# Fast-poll schedule while a confirmed write is pending: doubling delays, capped
+CONFIRM_FIRST_DELAY = 2
+CONFIRM_MAX_DELAY = 15
+
 __version__ = "1.0.0"
 
 _LOGGER = logging.getLogger(__name__)
@@ -52,12 +147,26 @@ _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up the Salus iT500 climate platform."""
-    # Retrieve the configuration from __init__.py
-    username = hass.data["salus_it500"]["username"]
-    password = hass.data["salus_it500"]["password"]
-    name = hass.data["salus_it500"]["name"]
-    device_id = hass.data["salus_it500"]["device_id"]
-    session = aiohttp.ClientSession()  # Create the session here
+    if discovery_info is None:
+        return
+
+    # Retrieve the device configuration forwarded by __init__.py
+    username = discovery_info["username"]
+    password = discovery_info["password"]
+    name = discovery_info["name"]
+    device_id = discovery_info["device_id"]
+    raw_attributes = discovery_info["raw_attributes"]
+    zones = (2,) if discovery_info["zone2"] else ()
+
+    # Thermostats of one account share the session (and its login cookies)
+    # and the background token renewal
+    accounts = hass.data[DOMAIN]["accounts"]
+    if username not in accounts:
+        session = aiohttp.ClientSession(timeout=CLIENT_TIMEOUT)
+        accounts[username] = SalusAuth(session, username, password)
+        accounts[username].async_start(hass)
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, accounts[username].async_stop)
+    auth = accounts[username]
 
     # Create the climate and sensor entities
     thermostat = SalusThermostat(
@@ -65,40 +174,227 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         password=password,
         name=name,
         device_id=device_id,
-        session=session,
+        session=auth.session,
+        raw_attributes=raw_attributes,
+        auth=auth,
+        zones=zones,
     )
-    temperature_sensor = SalusTemperatureSensor(thermostat)
-    target_temperature = SalusTargetTemperatureSensor(thermostat)
-    online_status = SalusOnlineBinarySensor(thermostat)
-    autoOff = SalusCH1autoOff(thermostat)
-    manual = SalusCH1manual(thermostat)
-    schedType = SalusCH1schedType(thermostat)
-    heatOnOffStatus = SalusCH1heatOnOffStatus(thermostat)
-    autoMode = SalusCH1autoMode(thermostat)
-    heatOnOff = SalusCH1heatOnOff(thermostat)
-    frostActive = SalusCH1frostActive(thermostat)
+
+    hass.data[DOMAIN]["thermostats"].append(thermostat)
 
     # Create climate entity with the retrieved data
+    zone_entities = [SalusZoneThermostat(thermostat, zone) for zone in zones]
+    hass.data[DOMAIN].setdefault("zones", []).extend(zone_entities)
+
     async_add_entities(
         [
             thermostat,
-            # temperature_sensor,
-            # target_temperature,
-            # online_status,
-            # autoOff,
-            # manual,
-            # schedType,
-            # heatOnOffStatus,
-            # autoMode,
-            # heatOnOff,
-            # frostActive,
+            *zone_entities,
         ],
         update_before_add=True,
     )
 
+    # The optional sensors read their values from the thermostat above
+    for platform in (Platform.SENSOR, Platform.BINARY_SENSOR):
+        hass.async_create_task(
+            discovery.async_load_platform(
+                hass, platform, DOMAIN, {"device_id": device_id}, hass.data[DOMAIN]["config"]
+            )
+        )
+
+    async def async_dump_capture(call):
+        """Return the captured Salus traffic of the requested thermostats."""
+        thermostats = {t.entity_id: t for t in hass.data[DOMAIN]["thermostats"]}
+        result = {}
+        for entity_id in call.data[ATTR_ENTITY_ID]:
+            thermostat = thermostats.get(entity_id)
+            if thermostat is None:
+                continue
+            result[entity_id] = thermostat.dump_capture()
+            if call.data["clear"]:
+                thermostat.clear_capture()
+        return result
+
+    def zone_targets():
+        """Return (thermostat, zone) behind every thermostat and zone entity."""
+        targets = {t.entity_id: (t, 1) for t in hass.data[DOMAIN]["thermostats"]}
+        targets.update(
+            {z.entity_id: (z._thermostat, z._zone) for z in hass.data[DOMAIN].get("zones", [])}
+        )
+        return targets
+
+    async def async_set_group(call):
+        """Apply one target state to several thermostats at once."""
+        targets = zone_targets()
+        result = {
+            entity_id: {"success": False, "error": "unknown Salus iT500 thermostat"}
+            for entity_id in call.data[ATTR_ENTITY_ID]
+            if entity_id not in targets
+        }
+        members = [
+            (entity_id, *targets[entity_id])
+            for entity_id in call.data[ATTR_ENTITY_ID]
+            if entity_id in targets
+        ]
+        result.update(
+            await async_apply_to_group(
+                members, call.data.get(ATTR_HVAC_MODE), call.data.get(ATTR_TEMPERATURE)
+            )
+        )
+        return result
+
+    async def async_set_confirmed(call):
+        """Apply a target state and return only once Salus reports it."""
+        targets = zone_targets()
+        unknown = [e for e in call.data[ATTR_ENTITY_ID] if e not in targets]
+        if unknown:
+            raise HomeAssistantError(f"Unknown Salus iT500 thermostats: {', '.join(unknown)}")
+
+        results = await asyncio.gather(
+            *(
+                targets[entity_id][0].async_set_confirmed(
+                    call.data.get(ATTR_HVAC_MODE),
+                    call.data.get(ATTR_TEMPERATURE),
+                    zone=targets[entity_id][1],
+                    timeout=call.data["timeout"],
+                )
+                for entity_id in call.data[ATTR_ENTITY_ID]
+            ),
+            return_exceptions=True,
+        )
+        errors = [str(result) for result in results if isinstance(result, Exception)]
+        if errors:
+            raise HomeAssistantError("; ".join(errors))
+
+    if not hass.services.has_service(DOMAIN, SERVICE_DUMP_CAPTURE):
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_DUMP_CAPTURE,
+            async_dump_capture,
+            schema=DUMP_CAPTURE_SCHEMA,
+            supports_response=SupportsResponse.ONLY,
+        )
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_SET_GROUP,
+            async_set_group,
+            schema=SET_GROUP_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+        hass.services.async_register(
+            DOMAIN,
+            SERVICE_SET_CONFIRMED,
+            async_set_confirmed,
+            schema=SET_CONFIRMED_SCHEMA,
+        )
+
+
+async def async_apply_to_group(members, hvac_mode=None, temperature=None):
+    """Send one target state to many zones and confirm it with one refresh.
+
+    `members` are (entity_id, thermostat, zone) tuples. Commands are grouped
+    by account and sent concurrently, at most GROUP_PARALLELISM at a time
+    per account; the refreshes share that limit. Only thermostats with a
+    delivered command are refreshed, so a queued command never waits for a
+    login. A zone succeeds only when the refresh shows the new state.
+    Returns the outcome per entity.
+    """
+    accounts = {}
+    for member in members:
+        accounts.setdefault(member[1].account, []).append(member)
+
+    async def async_apply_account(account_members):
+        semaphore = asyncio.Semaphore(GROUP_PARALLELISM)
+
+        async def async_send(thermostat, zone):
+            """Return the error of one zone, or None, and whether a command went out."""
+            async with semaphore:
+                try:
+                    success, sent = await thermostat.async_send_state(hvac_mode, temperature, zone)
+                except HomeAssistantError as err:
+                    return str(err), False
+            if success:
+                return None, sent
+            if not sent:
+                return "thermostat is offline or logging in again, the command was queued", False
+            return "Salus cloud rejected the command, it was queued for a retry", False
+
+        async def async_refresh(thermostat):
+            async with semaphore:
+                await thermostat.async_update()
+
+        outcomes = await asyncio.gather(
+            *(async_send(thermostat, zone) for _, thermostat, zone in account_members)
+        )
+        # One refresh round confirms every delivered command
+        delivered = {
+            thermostat
+            for (_, thermostat, _), (_, sent) in zip(account_members, outcomes)
+            if sent
+        }
+        await asyncio.gather(*(async_refresh(t) for t in delivered))
+        return [error for error, _ in outcomes]
+
+    errors = await asyncio.gather(
+        *(async_apply_account(account_members) for account_members in accounts.values())
+    )
+
+    result = {}
+    for account_members, account_errors in zip(accounts.values(), errors):
+        for (entity_id, thermostat, zone), error in zip(account_members, account_errors):
+            if error is None and thermostat._pending_fields(hvac_mode, temperature, zone):
+                error = "Salus did not report the new state after the refresh"
+            result[entity_id] = (
+                {"success": True} if error is None else {"success": False, "error": error}
+            )
+    return result
+
+
+def hvac_mode_from_flags(auto_off, heat_on_off, auto_mode, manual):
+    """Return (HVAC mode, operation mode) of a zone, or None if undecided."""
+    if auto_off == "1" and heat_on_off == "1":
+        return HVACMode.OFF, "OFF"
+    if auto_off == "0" and heat_on_off == "0":
+        return HVACMode.AUTO, "AUTO"
+    if auto_mode == "1" and manual == "1":
+        return HVACMode.HEAT, "HEAT"
+    return None
+
+
+def parse_zone(data, zone, previous=None):
+    """Return the state of one zone from an ajax_device_values.php response."""
+    prefix = f"CH{zone}"
+    previous = previous or {}
+    try:
+        current_temperature = float(data.get(f"{prefix}currentRoomTemp", 0))
+        target_temperature = float(data.get(f"{prefix}currentSetPoint", 0))
+    except ValueError:
+        # The zone is not wired on this device
+        return previous
+    mode = hvac_mode_from_flags(
+        data.get(f"{prefix}autoOff"),
+        data.get(f"{prefix}heatOnOff"),
+        data.get(f"{prefix}autoMode"),
+        data.get(f"{prefix}manual"),
+    )
+    hvac_mode, operation_mode = mode or (
+        previous.get("hvac_mode"), previous.get("operation_mode")
+    )
+    return {
+        "current_temperature": current_temperature,
+        "target_temperature": target_temperature,
+        "heating": data.get(f"{prefix}heatOnOffStatus") == "1",
+        "frost_active": data.get(f"{prefix}frostActive") == "1",
+        "hvac_mode": hvac_mode,
+        "operation_mode": operation_mode,
+    }
+
 
 class SalusThermostat(ClimateEntity):
-    def __init__(self, email, password, name=None, device_id=None, session=None):
+    # The raw flags change on almost every poll; keep them out of the recorder
+    _unrecorded_attributes = frozenset(RAW_ATTRIBUTES)
+
+    def __init__(self, email, password, name=None, device_id=None, session=None, raw_attributes=False, auth=None, zones=()):
         """Initialize the thermostat."""
         self._online = None
         self._target_temp = None
@@ -114,13 +410,18 @@ class SalusThermostat(ClimateEntity):
         self._frost = None
         self._status = None
         self._current_operation_mode = None
-        self._token = None
         self._session = session
+        self._auth = auth or SalusAuth(session, email, password)
+        self._auth.add_device(self._device_id)
         self._unique_id = self.name.lower() + "_" + self._device_id.lower()
         self._attr_unique_id = self._unique_id.lower()
         self._attr_supported_features = SUPPORT_FLAGS
         # Explicitly set the entity ID if needed
         self.entity_id = f"climate.{self._unique_id.lower().replace(" ", "")}"
+        # Static device metadata is built once and shared with the child entities
+        self._device_info = DeviceInfo(identifiers={(self._unique_id,)}, name=self._name)
+        self._snapshot_version = 0
+        self._attributes_cache = (None, None)
         self._CH1autoOff = None
         self._CH1manual = None
         self._CH1autoOff = None
@@ -129,14 +430,40 @@ class SalusThermostat(ClimateEntity):
         self._CH1autoMode = None
         self._CH1heatOnOff = None
         self._CH1frostActive = None
-
-        # Schedule an initial data fetch
-        asyncio.create_task(self._get_data())
+        # Raw traffic is kept in a small ring buffer; per-poll dumps go to a
+        # per-device child logger and are sampled
+        self._capture = ResponseCapture()
+        self._debug_sampler = LogSampler()
+        self._device_logger = _LOGGER.getChild(self._device_id.lower())
+        self._last_poll_time = None
+        self._raw_attributes = raw_attributes
+        self._listeners = []
+        # Zones beyond the first, parsed from the same poll
+        self._zones = tuple(zones)
+        self._zone_states = {}
+        # Last state reported by the device per zone, and pending retries
+        self._confirmed = {}
+        self._reconcile_tasks = {}
+        # Commands kept while Salus is unreachable, per zone and field
+        self._command_queue = {}
+        self._command_store = None
+        self._replay_task = None
+        self._replay_after = 0
+        # Confirmed writes waiting for a poll to show them, per zone
+        self._pending_writes = {}
+        self._schedule = ScheduleMirror()
+        self._cadence = CadenceEstimator()
+        self._schedule_store = None
+        self._polled_setpoint = None
+        self._cancel_poll = None
+        self._cancel_prediction = None
+        self._poll_lock = asyncio.Lock()
+        self._follow_up_poll = None
 
     @property
     def device_info(self):
         """Return device-specific attributes for this entity."""
-        return DeviceInfo(identifiers={(self._unique_id,)}, name=self._name)
+        return self._device_info
 
     @property
     def supported_features(self):
@@ -176,7 +503,8 @@ class SalusThermostat(ClimateEntity):
     @property
     def should_poll(self):
         """Return if polling is required."""
-        return True
+        # Polls are planned by the thermostat itself, see _schedule_next_poll
+        return False
 
     @property
     def min_temperature(self):
@@ -203,10 +531,37 @@ class SalusThermostat(ClimateEntity):
         """return target temperature"""
         return self._target_temperature
 
+    @property
+    def account(self):
+        """Return the Salus account this thermostat belongs to."""
+        return self._username
+
+    @property
+    def device_id(self):
+        """Return the Salus device ID polled by this thermostat."""
+        return self._device_id
+
     @property
     def extra_state_attributes(self):
         """Return the state attributes of the device."""
+        # Rebuilt only when a poll or a command changed the snapshot
+        version, attributes = self._attributes_cache
+        if version != self._snapshot_version:
+            attributes = MappingProxyType(self._build_state_attributes())
+            self._attributes_cache = (self._snapshot_version, attributes)
+        return attributes
+
+    def _build_state_attributes(self):
+        """Return a new dict of the state attributes."""
+        attributes = {"operation_mode": self._current_operation_mode}
+        if self._command_queue:
+            attributes["queued_command"] = {zone: dict(entry) for zone, entry in self._command_queue.items()}
+        if 1 in self._pending_writes:
+            attributes["pending_write"] = dict(self._pending_writes[1])
+        if not self._raw_attributes:
+            return attributes
         return {
+            **attributes,
             # ... [other attributes] ...
             "online": self._online,
             "CH1autoOff": self._CH1autoOff,
@@ -216,58 +571,34 @@ class SalusThermostat(ClimateEntity):
             "CH1autoMode": self._CH1autoMode,
             "CH1heatOnOff": self._CH1heatOnOff,
             "CH1frostActive": self._CH1frostActive,
-            "operation_mode": self._current_operation_mode,
         }
 
+    @property
+    def cadence(self):
+        """Return the estimate of the cloud refresh cadence of this device."""
+        return self._cadence
+
+    @property
+    def snapshot_version(self):
+        """Return a counter that changes whenever the polled state may have changed."""
+        return self._snapshot_version
+
     async def async_turn_on(self):
         """Turn the entity on."""        
         self._hvac_mode = HVACMode.AUTO
-        headers = {"content-type": "application/x-www-form-urlencoded"}
-        payload = {
-            "token": self._token,
-            "devId": self._device_id,
-            "auto": "0",
-            "auto_setZ1": "1",
-        }
-        try:
-            async with self._session.post(URL_SET_DATA, data=payload, headers=headers) as response:
-                if response.status != 200:
-                    _LOGGER.error(f"async_turn_on: Failed to post data to Salus. HTTP status code: {response.status}")
-                    return
-                
-                _LOGGER.debug("Successfull set cmd TURN ON")
-                self._current_operation_mode = "AUTO"
-                
-        except Exception as e:
-            _LOGGER.error(f"Error Setting TURN ON. error: {e}")
+        await self.async_reconcile(hvac_mode=HVACMode.AUTO)
 
     async def async_turn_off(self):
         """Turn the entity off."""
         self._hvac_mode = HVACMode.OFF        
-        headers = {"content-type": "application/x-www-form-urlencoded"}
-        payload = {
-            "token": self._token,
-            "devId": self._device_id,
-            "auto": "1",
-            "auto_setZ1": "1",
-        }
-        try:
-            async with self._session.post(URL_SET_DATA, data=payload, headers=headers) as response:
-                if response.status != 200:
-                    _LOGGER.error(f"async_turn_off: Failed to post data to Salus. HTTP status code: {response.status}")
-                    return
-
-                _LOGGER.debug("Successfull set cmd to TURN OFF")
-                self._current_operation_mode = "OFF"
-
-        except Exception as e:
-            _LOGGER.error(f"Error Setting TURN OFF. error: {e}")
+        await self.async_reconcile(hvac_mode=HVACMode.OFF)
 
     async def async_toggle(self):
         """Toggle the entity."""
-        if self._current_operation_mode == "OFF":
+        # Decide on what the device last reported, not on optimistic state
+        if self._confirmed.get(1, {}).get("hvac_mode", self._hvac_mode) == HVACMode.OFF:
             await self.async_turn_on()
-        elif self._current_operation_mode in ["HEAT", "OFF"]:
+        else:
             await self.async_turn_off()
 
 
@@ -277,86 +608,341 @@ class SalusThermostat(ClimateEntity):
         if temperature is None:
             return
         self._target_temperature = temperature
-        if self._hvac_mode in [HVACMode.HEAT]:
-            await self._set_temperature(temperature)
         
         if self.entity_id:  # Only call if entity is initialized
             self.async_write_ha_state()
 
-        await self.async_update()
+        await self.async_reconcile(temperature=temperature)
 
     async def async_set_hvac_mode(self, hvac_mode):
         """Set HVAC mode, via URL commands."""        
-        _LOGGER.debug(f"Setting the HVAC mode: {hvac_mode}")
+        _LOGGER.debug("Setting the HVAC mode: %s", hvac_mode)
 
         self._hvac_mode = hvac_mode
-        headers = {"content-type": "application/x-www-form-urlencoded"}
-        if hvac_mode == HVACMode.OFF:
-            payload = {
-                "token": self._token,
-                "devId": self._device_id,
-                "auto": "1",
-                "auto_setZ1": "1",
-            }
-            try:
-                async with self._session.post(URL_SET_DATA, data=payload, headers=headers) as response:
-                    if response.status != 200:
-                        _LOGGER.error(f"async_set_hvac_mode: {hvac_mode} - Failed to post data to Salus. HTTP status code: {response.status}")
-                        return
+        if not await self.async_reconcile(hvac_mode=hvac_mode):
+            return
 
-                    _LOGGER.debug(f"Successfull set cmd HVAC mode: {hvac_mode}")
-                    self._current_operation_mode = "OFF"
+        _LOGGER.debug("HVAC mode is set.")
 
-            except Exception as e:
-                _LOGGER.error(f"Error Setting HVAC mode. error: {e}")
-        
-        elif hvac_mode == HVACMode.HEAT:    # MAN mode
-            payload = {
-                "token": self._token,
-                "devId": self._device_id,
-                "tempUnit": "0",
-                "current_tempZ1_set": "1",
-                "current_tempZ1": self._target_temperature,
-            }
-            headers = {"content-type": "application/x-www-form-urlencoded"}
-            try:
-                async with self._session.post(URL_SET_DATA, data=payload, headers=headers) as response:
-                    if response.status != 200:
-                        _LOGGER.error(f"async_set_hvac_mode: {hvac_mode} - Failed to post data to Salus. HTTP status code: {response.status}")
-                        return
-                                   
-                    _LOGGER.debug(f"Successfull set cmd HVAC mode: {hvac_mode}")
-                    self._current_operation_mode = "MAN"
+    async def async_reconcile(self, hvac_mode=None, temperature=None, zone=1):
+        """Bring a zone to the desired mode and/or setpoint.
 
-            except Exception as e:
-                _LOGGER.error(f"Error getting data: {e}")
-        
-        elif hvac_mode == HVACMode.AUTO:
-            payload = {
-                "token": self._token,
-                "devId": self._device_id,
-                "auto": "0",
-                "auto_setZ1": "1",
-            }
-            try:
-                async with self._session.post(URL_SET_DATA, data=payload, headers=headers) as response:
-                    if response.status != 200:
-                        _LOGGER.error(f"async_set_hvac_mode: {hvac_mode} - Failed to post data to Salus. HTTP status code: {response.status}")
+        Only the set.php fields that differ from the last confirmed poll are
+        sent, so asserting the current state costs no request. If the next
+        poll does not show the change yet, the command is retried in the
+        background until it converges or RECONCILE_TIMEOUT passes. A command
+        Salus does not accept is queued and left to the replay instead.
+        """
+        self._cancel_reconcile(zone)
+        success, sent = await self._async_send_pending(hvac_mode, temperature, zone)
+        if not (success and sent):
+            # Nothing to do, or queued: the replay delivers it. Show the
+            # optimistic state and the queue now, the next poll may be far
+            self._async_write_states()
+            return success
+
+        await self.async_update()
+        if self._pending_fields(hvac_mode, temperature, zone) and self.hass is not None:
+            self._reconcile_tasks[zone] = self.hass.async_create_background_task(
+                self._async_reconcile_retry(hvac_mode, temperature, zone),
+                f"salus_it500 reconcile {self._device_id} zone {zone}",
+            )
+        return success
+
+    async def async_set_confirmed(self, hvac_mode=None, temperature=None, zone=1, timeout=60):
+        """Send a target state and wait until a poll shows it.
+
+        While the write is pending, the device alone is polled on a short,
+        capped schedule. Raises HomeAssistantError when the setpoint does not
+        apply in the resulting mode, when Salus refuses the command, or when
+        it does not report the new state within `timeout` seconds.
+        """
+        self._check_applicable(hvac_mode, temperature, zone)
+        self._cancel_reconcile(zone)
+        success, sent = await self._async_send_pending(hvac_mode, temperature, zone)
+        if not success:
+            if not sent:
+                raise HomeAssistantError(
+                    f"{self._device_id} is offline or logging in again, the command was queued for zone {zone}"
+                )
+            raise HomeAssistantError(
+                f"Salus did not accept the command for {self._device_id} zone {zone}, it was queued for a retry"
+            )
+        if not sent:
+            return
+
+        self._pending_writes[zone] = {
+            key: value
+            for key, value in (("hvac_mode", hvac_mode), ("temperature", temperature))
+            if value is not None
+        }
+        self._snapshot_version += 1
+        self._async_write_states()
+        try:
+            async with asyncio.timeout(timeout):
+                delay = CONFIRM_FIRST_DELAY
+                while True:
+                    await asyncio.sleep(delay)
+                    await self.async_update()
+                    if not self._pending_fields(hvac_mode, temperature, zone):
                         return
-                    
-                    _LOGGER.debug(f"Successfull set cmd HVAC mode: {hvac_mode}")
-                    self._current_operation_mode = "AUTO"
-                    
-            except Exception as e:
-                _LOGGER.error(f"Error Setting HVAC AUTO mode. error: {e}")
+                    delay = min(delay * 2, CONFIRM_MAX_DELAY)
+        except TimeoutError:
+            raise HomeAssistantError(
+                f"{self._device_id} zone {zone} did not report the new state within {timeout}s"
+            ) from None
+        finally:
+            self._pending_writes.pop(zone, None)
+            self._snapshot_version += 1
+            self._async_write_states()
+
+    async def async_send_state(self, hvac_mode=None, temperature=None, zone=1):
+        """Send a target mode and/or setpoint without refreshing afterwards.
+
+        Used by group commands, which confirm all thermostats with one
+        refresh round. Returns (success, sent) like _async_send_pending.
+        """
+        self._check_applicable(hvac_mode, temperature, zone)
+        self._cancel_reconcile(zone)
+        return await self._async_send_pending(hvac_mode, temperature, zone)
+
+    def _check_applicable(self, hvac_mode, temperature, zone):
+        """Raise HomeAssistantError when the setpoint does not apply in the resulting mode."""
+        mode = hvac_mode if hvac_mode is not None else self._confirmed.get(zone, {}).get("hvac_mode")
+        if temperature is not None and mode != HVACMode.HEAT:
+            # The setpoint of the other modes comes from the program
+            raise HomeAssistantError(
+                f"{self._device_id} zone {zone} is in {mode} mode, a target temperature only applies in heat mode"
+            )
 
-        _LOGGER.debug("HVAC mode is set.")
+    def _cancel_reconcile(self, zone):
+        """Stop retrying an older desired state of a zone."""
+        task = self._reconcile_tasks.pop(zone, None)
+        if task is not None:
+            task.cancel()
+
+    async def _async_reconcile_retry(self, hvac_mode, temperature, zone):
+        """Poll, and resend what is still missing, until the zone converges."""
+        deadline = time.monotonic() + RECONCILE_TIMEOUT.total_seconds()
+        while time.monotonic() < deadline:
+            await asyncio.sleep(RECONCILE_RETRY_DELAY.total_seconds())
+            await self.async_update()
+            if not self._pending_fields(hvac_mode, temperature, zone):
+                self._reconcile_tasks.pop(zone, None)
+                return
+            success, _ = await self._async_send_pending(hvac_mode, temperature, zone)
+            if not success:
+                # Queued now; the replay takes over
+                self._reconcile_tasks.pop(zone, None)
+                return
 
-        # # Call async_write_ha_state() to notify HA of the new state
-        if self.entity_id:  # Only call if entity is initialized
-            self.async_write_ha_state()
+        self._reconcile_tasks.pop(zone, None)
+        _LOGGER.warning(
+            "%s zone %s did not reach mode %s / setpoint %s within %s",
+            self._device_id, zone, hvac_mode, temperature, RECONCILE_TIMEOUT,
+        )
 
-        await self.async_update()
+    def _pending_fields(self, hvac_mode, temperature, zone):
+        """Return the set.php fields still needed to reach the desired state."""
+        confirmed = self._confirmed.get(zone, {})
+        fields = {}
+        if hvac_mode is not None and hvac_mode != confirmed.get("hvac_mode"):
+            fields.update(self._hvac_mode_fields(hvac_mode, zone))
+
+        # A setpoint only applies in HEAT; the HEAT mode fields carry it already
+        mode = hvac_mode if hvac_mode is not None else confirmed.get("hvac_mode")
+        if (
+            mode == HVACMode.HEAT
+            and temperature is not None
+            and temperature != confirmed.get("target_temperature")
+            and f"current_tempZ{zone}" not in fields
+        ):
+            fields.update(self._temperature_fields(temperature, zone))
+        return fields
+
+    async def _async_send_pending(self, hvac_mode, temperature, zone):
+        """Post the fields that still differ; return (success, sent)."""
+        if zone == 1:
+            if temperature is not None:
+                self._target_temperature = temperature
+            if hvac_mode is not None:
+                self._hvac_mode = hvac_mode
+        else:
+            state = self._zone_states.setdefault(zone, {})
+            if temperature is not None:
+                state["target_temperature"] = temperature
+            if hvac_mode is not None:
+                state["hvac_mode"] = hvac_mode
+
+        fields = self._pending_fields(hvac_mode, temperature, zone)
+        if not fields:
+            self._dequeue_command(hvac_mode, temperature, zone)
+            return True, False
+
+        if self._online is False or self._token is None:
+            # Keep the intent for the catch-up write instead of hammering the
+            # cloud, or waiting for a login
+            self._queue_command(hvac_mode, temperature, zone)
+            return False, False
+
+        action = f"HVAC mode {hvac_mode}" if hvac_mode is not None else "set_temperature"
+        if not await self._async_post_set(fields, action):
+            self._queue_command(hvac_mode, temperature, zone)
+            return False, True
+
+        self._dequeue_command(hvac_mode, temperature, zone)
+        if hvac_mode is not None:
+            if zone == 1:
+                self._current_operation_mode = OPERATION_MODES[hvac_mode]
+            else:
+                self._zone_states[zone]["operation_mode"] = OPERATION_MODES[hvac_mode]
+            self._snapshot_version += 1
+        return True, True
+
+    def _queue_command(self, hvac_mode, temperature, zone):
+        """Keep a command that could not be sent; the latest value per field wins.
+
+        A new value restarts the age and the replay attempts of the entry.
+        """
+        entry = self._command_queue.setdefault(str(zone), {})
+        changed = False
+        for field, value in (("hvac_mode", hvac_mode), ("temperature", temperature)):
+            if value is not None and entry.get(field) != value:
+                entry[field] = value
+                changed = True
+        if not changed:
+            return
+        entry["queued_at"] = dt_util.utcnow().timestamp()
+        entry["attempts"] = 0
+        self._replay_after = 0
+        _LOGGER.warning("Queued command for %s zone %s until Salus is reachable: %s", self._device_id, zone, entry)
+        self._save_command_queue()
+
+    def _dequeue_command(self, hvac_mode, temperature, zone):
+        """Drop the queued fields a newer command has delivered."""
+        entry = self._command_queue.get(str(zone))
+        if not entry:
+            return
+        if hvac_mode is not None:
+            entry.pop("hvac_mode", None)
+        if temperature is not None:
+            entry.pop("temperature", None)
+        if "hvac_mode" not in entry and "temperature" not in entry:
+            del self._command_queue[str(zone)]
+        self._save_command_queue()
+
+    def _drop_expired_commands(self):
+        """Drop the queued commands older than COMMAND_TTL."""
+        oldest = dt_util.utcnow().timestamp() - COMMAND_TTL.total_seconds()
+        for zone, entry in list(self._command_queue.items()):
+            if entry.get("queued_at", 0) < oldest:
+                _LOGGER.warning(
+                    "Dropped the command queued for %s zone %s, it is older than %s: %s",
+                    self._device_id, zone, COMMAND_TTL, entry,
+                )
+                del self._command_queue[zone]
+                self._save_command_queue()
+
+    def _save_command_queue(self):
+        """Persist the command queue."""
+        self._snapshot_version += 1
+        if self._command_store is not None:
+            self._command_store.async_delay_save(lambda: self._command_queue, COMMAND_SAVE_DELAY)
+
+    async def _async_replay_commands(self):
+        """Send the queued commands in one catch-up pass and confirm them with one poll.
+
+        An entry Salus does not accept waits for a doubling delay before the
+        next pass, and is dropped after REPLAY_MAX_ATTEMPTS passes.
+        """
+        try:
+            self._drop_expired_commands()
+            attempts = 0
+            for zone, entry in list(self._command_queue.items()):
+                hvac_mode = entry.get("hvac_mode")
+                success, sent = await self._async_send_pending(
+                    HVACMode(hvac_mode) if hvac_mode is not None else None,
+                    entry.get("temperature"),
+                    int(zone),
+                )
+                if success or not sent or zone not in self._command_queue:
+                    continue
+                entry["attempts"] = entry.get("attempts", 0) + 1
+                if entry["attempts"] >= REPLAY_MAX_ATTEMPTS:
+                    _LOGGER.error(
+                        "Salus did not accept the command queued for %s zone %s after %s attempts, dropped it: %s",
+                        self._device_id, zone, entry["attempts"], entry,
+                    )
+                    del self._command_queue[zone]
+                attempts = max(attempts, entry["attempts"])
+                self._save_command_queue()
+
+            if attempts:
+                backoff = min(REPLAY_BACKOFF * 2 ** (attempts - 1), REPLAY_MAX_BACKOFF)
+                self._replay_after = time.monotonic() + backoff.total_seconds()
+            if not self._command_queue:
+                await self.async_update()
+        finally:
+            self._replay_task = None
+
+    def pending_write(self, zone):
+        """Return the confirmed write a zone is waiting for, if any."""
+        return self._pending_writes.get(zone)
+
+    def zone_state(self, zone):
+        """Return the last polled state of a further zone."""
+        return self._zone_states.get(zone, {})
+
+    def _zone_target_temperature(self, zone):
+        """Return the target temperature of a zone."""
+        if zone == 1:
+            return self._target_temperature
+        return self.zone_state(zone).get("target_temperature")
+
+    def _temperature_fields(self, temperature, zone=1):
+        """Return the set.php fields of a manual setpoint."""
+        return {
+            "tempUnit": "0",
+            f"current_tempZ{zone}_set": "1",
+            f"current_tempZ{zone}": temperature,
+        }
+
+    def _hvac_mode_fields(self, hvac_mode, zone=1):
+        """Return the set.php fields selecting an HVAC mode."""
+        if hvac_mode == HVACMode.OFF:
+            return {"auto": "1", f"auto_setZ{zone}": "1"}
+        if hvac_mode == HVACMode.HEAT:    # MAN mode
+            return self._temperature_fields(self._zone_target_temperature(zone), zone)
+        return {"auto": "0", f"auto_setZ{zone}": "1"}
+
+    async def _async_post_set(self, fields, action):
+        """Post one set.php command, return True when Salus accepted it."""
+        try:
+            token = self._token
+            status, _ = await self._async_request(
+                "POST", URL_SET_DATA, data={"token": token, "devId": self._device_id, **fields}
+            )
+            # The body of set.php is not defined; only the status tells a refusal
+            if status in REJECTED_STATUSES:
+                # Rare: the token expired before the background renewal caught
+                # it. The command is queued and replayed once the renewal is done.
+                _LOGGER.warning("Salus refused the session token of %s, renewing it", self._device_id)
+                self._auth.async_invalidate(token)
+                return False
+        except Exception as e:
+            _LOGGER.error("Error setting %s. error: %s", action, e)
+            return False
+
+        if status != 200:
+            _LOGGER.error(
+                "%s - Failed to post data to Salus. HTTP status code: %s", action, status
+            )
+            return False
+
+        # The change this causes is not a cloud refresh
+        self._cadence.command_sent()
+        _LOGGER.debug("Successfull set cmd %s", action)
+        return True
 
     async def async_set_preset_mode(self, preset_mode):
         self._preset_mode = preset_mode
@@ -442,31 +1028,6 @@ class SalusThermostat(ClimateEntity):
         else:
             _LOGGER.error("Temperature must be provided to enable frost protection.")
 
-    async def _set_temperature(self, temperature):
-        """Set new target temperature, via URL commands."""
-        payload = {
-            "token": self._token,
-            "devId": self._device_id,
-            "tempUnit": "0",
-            "current_tempZ1_set": "1",
-            "current_tempZ1": temperature,
-        }
-        headers = {"content-type": "application/x-www-form-urlencoded"}
-        try:
-            async with self._session.post(URL_SET_DATA, data=payload, headers=headers) as response:
-                if response.status != 200:
-                    _LOGGER.error(
-                        f"_set_temperature - Failed to post data to Salus. HTTP status code: {response.status}"
-                    )
-                    return
-                self._target_temperature = temperature
-                # self.schedule_update_ha_state(force_refresh=True)
-                _LOGGER.debug("Salusfy set_temperature OK")
-        except Exception as e:
-            _LOGGER.error(f"Error getting data: {e}")
-
-        await self.async_update()
-
     def _set_preset_schedule(self):
         """Set the thermostat to the home preset."""
         # Set the temperature and other settings for the home preset
@@ -487,159 +1048,271 @@ class SalusThermostat(ClimateEntity):
         # Set the temperature and other settings for the sleep preset
         # using the Salus API
 
+    async def _async_request(self, method, url, params=None, data=None):
+        """Send one request to the Salus cloud and capture the exchange."""
+        return await async_request(
+            self._session, self._capture, method, url, params, data, secrets=self._auth.secrets
+        )
+
+    def dump_capture(self):
+        """Return the last captured requests of this device, with secrets redacted."""
+        return sorted(
+            self._capture.dump() + self._auth.dump_capture(), key=lambda entry: entry["time"]
+        )
+
+    def clear_capture(self):
+        """Drop the captured requests of this device."""
+        self._capture.clear()
+        self._auth.clear_capture()
+
+    @property
+    def _token(self):
+        """Return the current session token of this device."""
+        return self._auth.token(self._device_id)
+
     async def get_token(self):
         """Get the Session Token of the Thermostat."""
-        payload = {
-            "IDemail": self._username,
-            "password": self._password,
-            "login": "Login",
-            "keep_logged_in": "1",
-        }
-        headers = {"content-type": "application/x-www-form-urlencoded"}
-        _LOGGER.debug(
-            f"get_token --url_login: {URL_LOGIN}, payload: {payload}, headers: {headers}"
-        )
+        await self._auth.async_refresh()
 
-        try:
-            # Make the POST request to login and handle the response asynchronously
-            async with self._session.post(
-                URL_LOGIN, data=payload, headers=headers
-            ) as response:
-                if response.status != 200:
-                    _LOGGER.error(
-                        f"Failed to login to Salus iT500. HTTP status code: {response.status}"
-                    )
-                    return
-                _LOGGER.debug("Login successful. Proceeding to fetch the token.")
-
-                # Fetch the token using a GET request
-                params = {"devId": self._device_id}
-                async with self._session.get(
-                    URL_GET_TOKEN, params=params
-                ) as token_response:
-                    if token_response.status != 200:
-                        _LOGGER.error(
-                            f"Failed to fetch the token. HTTP status code: {token_response.status}"
-                        )
-                        return
+    def _snapshot(self):
+        """Return the polled values whose transitions are reported as events, per zone.
+
+        Optimistic state set by commands is left out, so a command fires its
+        event once a poll shows it, and cloud lag fires no reverse edge.
+        """
+        snapshot = {}
+        for zone in (1, *self._zones):
+            confirmed = self._confirmed.get(zone, {})
+            snapshot[zone] = {
+                EVENT_HEATING_CHANGED: confirmed.get("heating"),
+                EVENT_HVAC_MODE_CHANGED: confirmed.get("hvac_mode"),
+                EVENT_FROST_PROTECTION_CHANGED: confirmed.get("frost_active"),
+            }
+        # The device is online or not as a whole
+        snapshot[1][EVENT_ONLINE_CHANGED] = self._online
+        return snapshot
+
+    def _zone_entity_id(self, zone):
+        """Return the entity ID of a zone of this device."""
+        if zone == 1:
+            return self.entity_id
+        for entity in self.hass.data[DOMAIN].get("zones", []):
+            if entity._thermostat is self and entity._zone == zone:
+                return entity.entity_id
+        return None
+
+    def _fire_transition_events(self, previous, estimated):
+        """Fire one event for every value that changed between two snapshots."""
+        if self.hass is None:
+            return
 
-                    token_text = await token_response.text()
+        for zone, values in self._snapshot().items():
+            for event_type, new_value in values.items():
+                old_value = previous[zone][event_type]
+                if old_value is None or new_value is None or old_value == new_value:
+                    continue
+                self.hass.bus.async_fire(
+                    event_type,
+                    {
+                        ATTR_ENTITY_ID: self._zone_entity_id(zone),
+                        "device_id": self._device_id,
+                        "zone": zone,
+                        "old_value": old_value,
+                        "new_value": new_value,
+                        "estimated_time": estimated.isoformat(),
+                    },
+                )
 
-                    # Check if token_text is a valid string before using regex search
-                    if token_text and isinstance(token_text, str):
-                        result = re.search(
-                            r'<input id="token" type="hidden" value="(.*)" />',
-                            token_text,
-                        )
-                        if result:
-                            self._token = result.group(1)
-                            _LOGGER.debug("Successfully retrieved the token.")
-                        else:
-                            _LOGGER.error(
-                                "Token not found in the response. Check the HTML structure."
-                            )
-                    else:
-                        _LOGGER.error(
-                            "Unexpected response format when getting the token. Expected a string."
-                        )
+    def _learn_schedule(self, previous, estimated, polled_at):
+        """Update the schedule mirror from the setpoint seen by the last poll."""
+        previous_setpoint = self._polled_setpoint
+        if not self._online:
+            return
+        confirmed = self._confirmed.get(1, {})
+        setpoint = confirmed.get("target_temperature")
+        self._polled_setpoint = setpoint
+        if (
+            previous_setpoint is None
+            or confirmed.get("hvac_mode") != HVACMode.AUTO
+            or previous[1][EVENT_HVAC_MODE_CHANGED] != HVACMode.AUTO
+        ):
+            return
 
-        except aiohttp.ClientError as e:
-            _LOGGER.error(f"HTTP request failed: {e}")
-        except Exception as e:
-            _LOGGER.error(f"Unexpected error while getting the token: {e}")
+        grace = self._transition_grace()
+        if setpoint != previous_setpoint:
+            # The midpoint between the polls only places steps the mirror
+            # did not predict; a predicted one keeps its slot
+            if self._last_poll_time is not None and self._schedule.confirm_between(
+                dt_util.as_local(self._last_poll_time - grace), dt_util.as_local(polled_at), setpoint
+            ):
+                return
+            self._schedule.learn(dt_util.as_local(estimated), setpoint)
+        elif self._last_poll_time is not None and self._schedule:
+            # A predicted transition still not seen once the cloud had time
+            # to report it may not be part of the program
+            if not self._schedule.forget_between(
+                dt_util.as_local(self._last_poll_time - grace),
+                dt_util.as_local(polled_at - grace),
+            ):
+                return
+        else:
+            return
+
+        if self._schedule_store is not None:
+            self._schedule_store.async_delay_save(self._schedule.as_list, SCHEDULE_SAVE_DELAY)
 
     async def _get_data(self):
+        """Fetch the latest data, after the poll already running if there is one.
+
+        A running poll may have started before what the caller waits for,
+        such as a command, so the caller waits for one follow-up poll
+        instead. All requests made meanwhile share that follow-up.
+        """
+        if self._poll_lock.locked():
+            if self._follow_up_poll is None:
+                self._follow_up_poll = asyncio.create_task(self._async_poll())
+            await asyncio.shield(self._follow_up_poll)
+            return
+        await self._async_poll()
+
+    async def _async_poll(self):
+        """Poll the device and report the transitions it reveals."""
+        async with self._poll_lock:
+            # Requests from now on need a poll started after this one
+            self._follow_up_poll = None
+            previous = self._snapshot()
+            try:
+                async with asyncio.timeout(POLL_WATCHDOG):
+                    await self._fetch_data()
+            except TimeoutError:
+                # A slow cloud says nothing about the token; a refused one is
+                # detected from the response
+                _LOGGER.warning(
+                    "Poll of %s did not finish within %ss, aborted", self._device_id, POLL_WATCHDOG
+                )
+                self._online = False
+
+            # Edges happened somewhere between the previous poll and this one
+            polled_at = dt_util.utcnow()
+            if self._last_poll_time is None:
+                estimated = polled_at
+            else:
+                estimated = self._last_poll_time + (polled_at - self._last_poll_time) / 2
+
+            self._snapshot_version += 1
+            self._fire_transition_events(previous, estimated)
+            self._learn_schedule(previous, estimated, polled_at)
+            self._last_poll_time = polled_at
+
+        # The cloud is back: replay what was queued while it was not
+        if (
+            self._online
+            and self._command_queue
+            and self._replay_task is None
+            and time.monotonic() >= self._replay_after
+            and self.hass is not None
+        ):
+            self._replay_task = self.hass.async_create_background_task(
+                self._async_replay_commands(), f"salus_it500 replay {self._device_id}"
+            )
+
+    async def _fetch_data(self):
         """Fetch the latest data from the Salus Thermostat."""
-        # Refresh token if it's not available
-        if self._token is None:
-            await self.get_token()
+        # A poll waits for a login when there is no token: before the first
+        # login, and after Salus refused the last one. Renewals ahead of
+        # expiry run in the background
+        token = await self._auth.async_get_token(self._device_id)
 
         params = {
             "devId": self._device_id,
-            "token": self._token,
+            "token": token,
             "&_": str(int(round(time.time() * 1000))),
         }
 
         try:
             # Make the GET request to fetch data asynchronously
-            async with self._session.get(URL_GET_DATA, params=params) as response:
-                if response.status != 200:
-                    _LOGGER.error(
-                        f"Failed to fetch data from Salus. HTTP status code: {response.status}"
-                    )
-                    return
-
-                data_text = await response.text()
-
-                # Check if data_text is a valid JSON string before attempting to parse
-                if data_text:
-                    try:
-                        data = json.loads(data_text)
-                        _LOGGER.debug(f"Salusfy get_data output: {data_text}")
-
-                        # Check valid data
-                        if data.get("CH1autoOff") != "":
-                            self._online = True
-                            # Parse and update device data
-                            self._target_temperature = float(
-                                data.get("CH1currentSetPoint", 0)
-                            )
-                            self._current_temperature = float(
-                                data.get("CH1currentRoomTemp", 0)
-                            )
-                            self._frost = float(data.get("frost", 0))
-
-                            self._CH1autoOff = data.get("CH1autoOff", 0)
-                            self._CH1manual = data.get("CH1manual", 0)
-                            self._CH1schedType = data.get("CH1schedType", 0)
-                            self._CH1heatOnOffStatus = data.get("CH1heatOnOffStatus", 0)
-                            self._CH1autoMode = data.get("CH1autoMode", 0)
-                            self._CH1heatOnOff = data.get("CH1heatOnOff", 0)
-                            self._CH1frostActive = data.get("CH1frostActive", 0)
-
-                            # Update the status and operation mode
-                            self._status = (
-                                "ON" if data.get("CH1heatOnOffStatus") == "1" else "OFF"
-                            )
-
-                            _LOGGER.debug(f"self._CH1autoOff: {self._CH1autoOff}, self._CH1heatOnOff: {self._CH1heatOnOff}, self._CH1autoMode: {self._CH1autoMode}, self._CH1manual: {self._CH1manual}")
-
-                            # Set HVACmode
-                            if self._CH1autoOff == "1" and self._CH1heatOnOff == "1":
-                                self._hvac_mode = HVACMode.OFF
-                                self._current_operation_mode = "OFF"
-                            
-                            elif self._CH1autoOff == "0" and self._CH1heatOnOff == "0":
-                                self._hvac_mode = HVACMode.AUTO                            
-                                self._current_operation_mode = "AUTO"
-
-                            elif self._CH1autoMode == "1" and self._CH1manual == "1":
-                                self._hvac_mode = HVACMode.HEAT                            
-                                self._current_operation_mode = "HEAT"
-
-                            _LOGGER.debug(f"Set HVACMode: {self._hvac_mode}")
-
-                        else:                            
-                            self._online = False
-                            _LOGGER.debug("Request ok, but get invalid data")
-                            _LOGGER.debug(f"self._CH1autoOff: {self._CH1autoOff}, self._CH1heatOnOff: {self._CH1heatOnOff}, self._CH1autoMode: {self._CH1autoMode}, self._CH1manual: {self._CH1manual}")
-
-                    except json.JSONDecodeError as json_err:
-                        _LOGGER.error(
-                            f"Failed to parse JSON data from Salus response: {json_err}"
+            status, data_text = await self._async_request("GET", URL_GET_DATA, params=params)
+            if is_rejected(status, data_text):
+                _LOGGER.warning("Salus refused the session token of %s, renewing it", self._device_id)
+                self._auth.async_invalidate(token)
+                return
+            if status != 200:
+                _LOGGER.error(
+                    "Failed to fetch data from Salus. HTTP status code: %s", status
+                )
+                return
+
+            # Check if data_text is a valid JSON string before attempting to parse
+            if data_text:
+                try:
+                    data = json.loads(data_text)
+                    if self._device_logger.isEnabledFor(logging.DEBUG) and self._debug_sampler.sample():
+                        self._device_logger.debug("Salusfy get_data output: %s", data_text)
+
+                    # Check valid data
+                    if data.get("CH1autoOff") != "":
+                        self._online = True
+                        self._cadence.observe(dt_util.utcnow().timestamp(), hash(data_text))
+                        # Parse and update device data
+                        self._frost = float(data.get("frost", 0))
+
+                        self._CH1autoOff = data.get("CH1autoOff", 0)
+                        self._CH1manual = data.get("CH1manual", 0)
+                        self._CH1schedType = data.get("CH1schedType", 0)
+                        self._CH1heatOnOffStatus = data.get("CH1heatOnOffStatus", 0)
+                        self._CH1autoMode = data.get("CH1autoMode", 0)
+                        self._CH1heatOnOff = data.get("CH1heatOnOff", 0)
+                        self._CH1frostActive = data.get("CH1frostActive", 0)
+
+                        # Update the status and operation mode
+                        self._status = (
+                            "ON" if data.get("CH1heatOnOffStatus") == "1" else "OFF"
                         )
-                else:
+
+                        self._device_logger.debug(
+                            "CH1autoOff: %s, CH1heatOnOff: %s, CH1autoMode: %s, CH1manual: %s",
+                            self._CH1autoOff, self._CH1heatOnOff, self._CH1autoMode, self._CH1manual,
+                        )
+
+                        # The first zone is this entity; the further zones
+                        # come from the same response
+                        for zone in (1, *self._zones):
+                            self._confirmed[zone] = parse_zone(data, zone, self._confirmed.get(zone))
+                            if zone != 1:
+                                self._zone_states[zone] = dict(self._confirmed[zone])
+
+                        state = self._confirmed[1]
+                        self._target_temperature = state.get("target_temperature")
+                        self._current_temperature = state.get("current_temperature")
+                        if state.get("hvac_mode") is not None:
+                            self._hvac_mode = state["hvac_mode"]
+                            self._current_operation_mode = state["operation_mode"]
+
+                        self._device_logger.debug("Set HVACMode: %s", self._hvac_mode)
+
+                    else:                            
+                        self._online = False
+                        _LOGGER.debug("Request ok, but get invalid data")
+
+                except json.JSONDecodeError as json_err:
                     _LOGGER.error(
-                        "Received an empty response when fetching data from Salus."
+                        "Failed to parse JSON data from Salus response: %s", json_err
                     )
+            else:
+                _LOGGER.error(
+                    "Received an empty response when fetching data from Salus."
+                )
 
+        except TimeoutError:
+            self._online = False
+            _LOGGER.error("Timed out while getting data from Salus")
         except aiohttp.ClientError as http_err:
             self._online = False
             _LOGGER.error(
-                f"HTTP request error while getting data from Salus: {http_err}"
+                "HTTP request error while getting data from Salus: %s", http_err
             )
         except Exception as e:
-            _LOGGER.error(f"Unexpected error while getting data from Salus: {e}")
+            _LOGGER.error("Unexpected error while getting data from Salus: %s", e)
 
         # Call async_write_ha_state() to notify HA of the new state
         # if self.entity_id:  # Only call if entity is initialized
@@ -648,244 +1321,173 @@ class SalusThermostat(ClimateEntity):
     async def async_update(self):
         """Get the latest data."""
         await self._get_data()
+        self._async_write_states()
+
+        # A command may have changed the mode, so plan the next poll again
+        if self._cancel_poll is not None:
+            self._schedule_next_poll()
 
+    def _async_write_states(self):
+        """Write the state of the thermostat and its dependent entities."""
         if self.entity_id:  # Only call if entity is initialized
             self.async_write_ha_state()
 
+        for entity in self._listeners:
+            entity.async_write_ha_state()
 
+    async def async_added_to_hass(self):
+        """Restore the schedule mirror and start polling."""
+        await super().async_added_to_hass()
+        self._schedule_store = Store(
+            self.hass, SCHEDULE_STORAGE_VERSION, f"{DOMAIN}.{self._device_id}.schedule"
+        )
+        stored = await self._schedule_store.async_load()
+        if stored:
+            self._schedule = ScheduleMirror(stored)
 
-class SalusTemperatureSensor(SensorEntity):
-    """Representation of a Salus Temperature Sensor."""
-
-    def __init__(self, thermostat):
-        """Initialize the sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} Current Temperature"
-        self._attr_unit_of_measurement = UnitOfTemperature.CELSIUS
-        self._attr_device_class = "temperature"
-        self._attr_unique_id = f"{thermostat.unique_id}_current_temperature"
-
-    @property
-    def state(self):
-        """Return the current temperature."""
-        return self._thermostat._current_temperature
-
-    @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
-
-class SalusTargetTemperatureSensor(SensorEntity):
-    """Representation of a Salus Temperature Sensor."""
-
-    def __init__(self, thermostat):
-        """Initialize the sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} Target Temperature"
-        self._attr_unit_of_measurement = UnitOfTemperature.CELSIUS
-        self._attr_device_class = "temperature"
-        self._attr_unique_id = f"{thermostat.unique_id}_target_temperature"
-
-    @property
-    def state(self):
-        """Return the current temperature."""
-        return self._thermostat._target_temperature
-
-    @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
-
-class SalusOnlineBinarySensor(BinarySensorEntity):
-    """Representation of a Online Status."""
-
-    def __init__(self, thermostat):
-        """Initialize the binary sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} Online Status"
-        self._attr_unique_id = f"{thermostat.unique_id}_online_status"
-
-    @property
-    def is_on(self):
-        return self._thermostat._online
-
-    @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
-
-class SalusCH1autoOff(BinarySensorEntity):
-    """Representation of a CH1autoOff."""
-
-    def __init__(self, thermostat):
-        """Initialize the binary sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} CH1autoOff"
-        self._attr_unique_id = f"{thermostat.unique_id}_CH1autoOff"
-
-    @property
-    def is_on(self):
-        return self._thermostat._CH1autoOff == "1"
-
-    @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
-
-class SalusCH1manual(BinarySensorEntity):
-    """Representation of a CH1manual."""
-
-    def __init__(self, thermostat):
-        """Initialize the binary sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} CH1manual"
-        self._attr_unique_id = f"{thermostat.unique_id}_CH1manual"
-
-    @property
-    def is_on(self):
-        return self._thermostat._CH1manual == "1"
-
-    @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
-
-class SalusCH1schedType(BinarySensorEntity):
-    """Representation of a CH1schedType."""
-
-    def __init__(self, thermostat):
-        """Initialize the binary sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} CH1schedType"
-        self._attr_unique_id = f"{thermostat.unique_id}_CH1schedType"
-
-    @property
-    def is_on(self):
-        return self._thermostat._CH1schedType == "1"
-
-    @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
-
-class SalusCH1heatOnOffStatus(BinarySensorEntity):
-    """Representation of a CH1heatOnOffStatus."""
-
-    def __init__(self, thermostat):
-        """Initialize the binary sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} CH1heatOnOffStatus"
-        self._attr_unique_id = f"{thermostat.unique_id}_CH1heatOnOffStatus"
-
-    @property
-    def is_on(self):
-        return self._thermostat._CH1heatOnOffStatus == "1"
-
-    @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
-
-class SalusCH1autoMode(BinarySensorEntity):
-    """Representation of a CH1autoMode."""
+        self._command_store = Store(
+            self.hass, COMMAND_STORAGE_VERSION, f"{DOMAIN}.{self._device_id}.commands"
+        )
+        self._command_queue.update(await self._command_store.async_load() or {})
+        self._drop_expired_commands()
+        self._schedule_next_poll()
+
+    async def async_will_remove_from_hass(self):
+        """Stop polling and retrying commands."""
+        self._cancel_timers()
+        for zone in list(self._reconcile_tasks):
+            self._cancel_reconcile(zone)
+
+    def _cancel_timers(self):
+        """Cancel the pending poll and setpoint prediction."""
+        if self._cancel_poll is not None:
+            self._cancel_poll()
+            self._cancel_poll = None
+        if self._cancel_prediction is not None:
+            self._cancel_prediction()
+            self._cancel_prediction = None
+
+    def _next_poll_delay(self):
+        """Return the seconds until the next poll and the transition it confirms."""
+        if self._hvac_mode != HVACMode.AUTO or not self._online or not self._schedule:
+            return self._aligned_delay(SCAN_INTERVAL), None
+
+        # In AUTO the setpoint follows the program: poll slowly, and right
+        # after the next predicted transition
+        now = dt_util.now()
+        transition = self._schedule.next_transition(now)
+        if transition is None or transition[0] - now > AUTO_SCAN_INTERVAL:
+            return self._aligned_delay(AUTO_SCAN_INTERVAL), None
+        # The step comes before the next base poll: show it when due, and
+        # confirm it once the cloud had time to report it
+        return (transition[0] - now + self._transition_grace()).total_seconds(), transition
+
+    def _transition_grace(self):
+        """Return how long after a transition the cloud is sure to report it."""
+        if self._cadence.period is None:
+            return TRANSITION_GRACE + SCAN_INTERVAL
+        return TRANSITION_GRACE + datetime.timedelta(seconds=self._cadence.period)
+
+    def _aligned_delay(self, interval):
+        """Return a delay close to `interval` that lands just after a cloud refresh."""
+        if not self._cadence.ready:
+            return interval.total_seconds()
+        return self._cadence.poll_delay(dt_util.utcnow().timestamp(), interval.total_seconds())
+
+    def _schedule_next_poll(self):
+        """Plan the next poll, and the predicted setpoint change before it."""
+        self._cancel_timers()
+        delay, transition = self._next_poll_delay()
+        self._cancel_poll = async_call_later(self.hass, delay, self._async_scheduled_poll)
+        if transition is not None:
+            self._cancel_prediction = async_track_point_in_time(
+                self.hass, self._async_apply_prediction, transition[0]
+            )
 
-    def __init__(self, thermostat):
-        """Initialize the binary sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} CH1autoMode"
-        self._attr_unique_id = f"{thermostat.unique_id}_CH1autoMode"
+    async def _async_scheduled_poll(self, _now):
+        """Poll the device and plan the next poll."""
+        self._cancel_poll = None
+        try:
+            await self.async_update()
+        finally:
+            self._schedule_next_poll()
+
+    @callback
+    def _async_apply_prediction(self, now):
+        """Show the setpoint of the program as soon as it is due."""
+        self._cancel_prediction = None
+        # Read the program when the step is due, it may have been relearned
+        setpoint = self._schedule.setpoint_at(dt_util.as_local(now))
+        if self._hvac_mode == HVACMode.AUTO and setpoint is not None:
+            self._target_temperature = setpoint
+            self._async_write_states()
+
+    def async_add_listener(self, entity):
+        """Push the state of a dependent entity after every poll."""
+        self._listeners.append(entity)
+        return lambda: self._listeners.remove(entity)
+
+
+class SalusZoneThermostat(SalusThermostatChildEntity, ClimateEntity):
+    """A further heating zone of a thermostat, backed by the thermostat's poll."""
+
+    _attr_entity_registry_enabled_default = True
+    _attr_entity_category = None
+    _attr_supported_features = SUPPORT_FLAGS
+    _attr_hvac_modes = SUPPORT_HVAC_MODES
+    _attr_min_temp = MIN_TEMP
+    _attr_max_temp = MAX_TEMP
+    _attr_temperature_unit = UnitOfTemperature.CELSIUS
+
+    def __init__(self, thermostat, zone):
+        """Initialize the zone."""
+        super().__init__(thermostat, f"z{zone}", f"Zone {zone}")
+        self._zone = zone
+        self._attributes_cache = (None, None)
 
     @property
-    def is_on(self):
-        return self._thermostat._CH1autoMode == "1"
+    def hvac_mode(self):
+        """Return the current HVAC mode."""
+        return self._thermostat.zone_state(self._zone).get("hvac_mode")
 
     @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
-
-class SalusCH1heatOnOff(BinarySensorEntity):
-    """Representation of a CH1heatOnOff."""
-
-    def __init__(self, thermostat):
-        """Initialize the binary sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} CH1heatOnOff"
-        self._attr_unique_id = f"{thermostat.unique_id}_CH1heatOnOff"
+    def current_temperature(self):
+        """return current temperature"""
+        return self._thermostat.zone_state(self._zone).get("current_temperature")
 
     @property
-    def is_on(self):
-        return self._thermostat._CH1heatOnOff == "1"
+    def target_temperature(self):
+        """return target temperature"""
+        return self._thermostat.zone_state(self._zone).get("target_temperature")
 
     @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
+    def extra_state_attributes(self):
+        """Return the state attributes of the zone."""
+        version, attributes = self._attributes_cache
+        if version != self._thermostat.snapshot_version:
+            attributes = {"operation_mode": self._thermostat.zone_state(self._zone).get("operation_mode")}
+            pending = self._thermostat.pending_write(self._zone)
+            if pending:
+                attributes["pending_write"] = dict(pending)
+            attributes = MappingProxyType(attributes)
+            self._attributes_cache = (self._thermostat.snapshot_version, attributes)
+        return attributes
 
-class SalusCH1frostActive(BinarySensorEntity):
-    """Representation of a CH1frostActive."""
+    async def async_turn_on(self):
+        """Turn the zone on."""
+        await self.async_set_hvac_mode(HVACMode.AUTO)
 
-    def __init__(self, thermostat):
-        """Initialize the binary sensor."""
-        self._thermostat = thermostat
-        self._attr_name = f"{thermostat.name} CH1frostActive"
-        self._attr_unique_id = f"{thermostat.unique_id}_CH1frostActive"
+    async def async_turn_off(self):
+        """Turn the zone off."""
+        await self.async_set_hvac_mode(HVACMode.OFF)
 
-    @property
-    def is_on(self):
-        return self._thermostat._CH1frostActive == "1"
+    async def async_set_temperature(self, **kwargs):
+        """Set new target temperature."""
+        temperature = kwargs.get(ATTR_TEMPERATURE)
+        if temperature is None:
+            return
+        await self._thermostat.async_reconcile(temperature=temperature, zone=self._zone)
 
-    @property
-    def device_info(self):
-        """Return the device info for this sensor."""
-        return {
-            "identifiers": {(self._attr_unique_id,)},
-            "name": self._attr_name,
-            "manufacturer": "Salus",
-            "model": "iT500",
-        }
+    async def async_set_hvac_mode(self, hvac_mode):
+        """Set HVAC mode of the zone."""
+        await self._thermostat.async_reconcile(hvac_mode=hvac_mode, zone=self._zone)
@@ -0,0 +1,25 @@
+"""
+Constants shared by the Salus iT500 cloud client and its entities.
+"""
+import datetime
+
+import aiohttp
+
+URL_LOGIN = "https://salus-it500.com/public/login.php"
+URL_GET_TOKEN = "https://salus-it500.com/public/control.php"
+URL_GET_DATA = "https://salus-it500.com/public/ajax_device_values.php"
+URL_SET_DATA = "https://salus-it500.com/includes/set.php"
+
+# Deadlines (seconds) so a half-open connection cannot hold an update slot
+CONNECT_TIMEOUT = 5
+FIRST_BYTE_TIMEOUT = 10
+REQUEST_TIMEOUT = 15
+LOGIN_BUDGET = 25
+POLL_WATCHDOG = 45
+CLIENT_TIMEOUT = aiohttp.ClientTimeout(
+    total=REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT, sock_read=FIRST_BYTE_TIMEOUT
+)
+
+# Tokens are renewed in the background well before the cloud drops them
+TOKEN_REFRESH_AFTER = datetime.timedelta(minutes=30)
+TOKEN_CHECK_INTERVAL = datetime.timedelta(minutes=5)
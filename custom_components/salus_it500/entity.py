@@ -0,0 +1,38 @@
+"""
+Common base of the entities that mirror values polled by a Salus thermostat.
+"""
+from homeassistant.const import EntityCategory
+
+from . import DOMAIN
+
+
+def get_thermostat(hass, device_id):
+    """Return the thermostat entity polling the given device."""
+    for thermostat in hass.data[DOMAIN].get("thermostats", []):
+        if thermostat.device_id == device_id:
+            return thermostat
+    return None
+
+
+class SalusThermostatChildEntity:
+    """Entity whose state is pushed by its thermostat after every poll.
+
+    These entities are disabled by default, so only the values a user
+    explicitly enables end up in the recorder.
+    """
+
+    _attr_should_poll = False
+    _attr_entity_registry_enabled_default = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(self, thermostat, key, label):
+        """Initialize the entity."""
+        self._thermostat = thermostat
+        self._attr_name = f"{thermostat.name} {label}"
+        self._attr_unique_id = f"{thermostat.unique_id}_{key}"
+        self._attr_device_info = thermostat.device_info
+
+    async def async_added_to_hass(self):
+        """Subscribe to the updates of the thermostat."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._thermostat.async_add_listener(self))
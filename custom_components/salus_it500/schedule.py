@@ -0,0 +1,104 @@
+"""
+Local mirror of the weekly program of a Salus iT500 thermostat.
+
+The cloud does not expose the program, so the mirror is learned from the
+setpoint changes observed while the thermostat runs in AUTO mode.
+"""
+import datetime
+
+# The iT500 program is set in 10 minute steps
+SLOT_MINUTES = 10
+MINUTES_PER_DAY = 24 * 60
+# A learned transition is only dropped after this many polls in a row found
+# it did not happen
+FORGET_AFTER_MISSES = 2
+
+
+def _slot(when):
+    """Return the (weekday, minute of day) program slot boundary nearest to a local time."""
+    when = when + datetime.timedelta(minutes=SLOT_MINUTES / 2)
+    minute = when.hour * 60 + when.minute
+    return when.weekday(), minute - minute % SLOT_MINUTES
+
+
+class ScheduleMirror:
+    """Weekly setpoint program, keyed by weekday and minute of the day."""
+
+    def __init__(self, transitions=None):
+        """Initialize the mirror from stored transitions."""
+        self._transitions = {}
+        self._misses = {}
+        for weekday, minute, setpoint in transitions or ():
+            self._transitions[(weekday, minute)] = setpoint
+
+    def __bool__(self):
+        """Return True once at least one transition has been learned."""
+        return bool(self._transitions)
+
+    def as_list(self):
+        """Return the transitions in a JSON serializable form."""
+        return [
+            [weekday, minute, setpoint]
+            for (weekday, minute), setpoint in sorted(self._transitions.items())
+        ]
+
+    def learn(self, when, setpoint):
+        """Record that the setpoint changed to `setpoint` at local time `when`."""
+        slot = _slot(when)
+        self._transitions[slot] = setpoint
+        self._misses.pop(slot, None)
+
+    def confirm_between(self, start, end, setpoint):
+        """Return True when a transition to `setpoint` is predicted in (start, end].
+
+        Such a transition was seen as predicted; its misses are cleared and
+        its slot is kept, however far the estimated time is from it.
+        """
+        for when, predicted in self._iter_transitions(start, end):
+            if predicted == setpoint:
+                self._misses.pop(_slot(when), None)
+                return True
+        return False
+
+    def forget_between(self, start, end):
+        """Count the transitions predicted in (start, end] as missed.
+
+        A transition missed FORGET_AFTER_MISSES times in a row is dropped.
+        Return True when the program changed.
+        """
+        changed = False
+        for when, _ in list(self._iter_transitions(start, end)):
+            slot = _slot(when)
+            self._misses[slot] = self._misses.get(slot, 0) + 1
+            if self._misses[slot] >= FORGET_AFTER_MISSES:
+                del self._transitions[slot]
+                del self._misses[slot]
+                changed = True
+        return changed
+
+    def setpoint_at(self, when):
+        """Return the setpoint the program asks for at local time `when`."""
+        latest = None
+        for latest in self._iter_transitions(when - datetime.timedelta(days=7), when):
+            pass
+        return latest[1] if latest else None
+
+    def next_transition(self, after):
+        """Return (local time, setpoint) of the first transition after `after`."""
+        for transition in self._iter_transitions(after, after + datetime.timedelta(days=7)):
+            return transition
+        return None
+
+    def _iter_transitions(self, start, end):
+        """Yield (local time, setpoint) of the transitions in (start, end], in order."""
+        if not self._transitions:
+            return
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day <= end:
+            for (weekday, minute), setpoint in sorted(self._transitions.items()):
+                if weekday != day.weekday():
+                    continue
+                when = day + datetime.timedelta(minutes=minute)
+                if start < when <= end:
+                    yield when, setpoint
+            day += datetime.timedelta(days=1)
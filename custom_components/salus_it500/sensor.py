@@ -0,0 +1,102 @@
+"""
+Optional sensors of the Salus iT500 thermostat.
+"""
+from types import MappingProxyType
+
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorStateClass
+from homeassistant.const import UnitOfTemperature, UnitOfTime
+from homeassistant.util import dt as dt_util
+
+from .entity import SalusThermostatChildEntity, get_thermostat
+
+
+async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
+    """Set up the Salus iT500 sensor platform."""
+    if discovery_info is None:
+        return
+    thermostat = get_thermostat(hass, discovery_info["device_id"])
+
+    async_add_entities(
+        [
+            SalusTemperatureSensor(thermostat),
+            SalusTargetTemperatureSensor(thermostat),
+            SalusCloudCadenceSensor(thermostat),
+        ]
+    )
+
+
+class SalusTemperatureSensor(SalusThermostatChildEntity, SensorEntity):
+    """Representation of a Salus Temperature Sensor."""
+
+    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
+    _attr_device_class = SensorDeviceClass.TEMPERATURE
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_entity_category = None
+
+    def __init__(self, thermostat):
+        """Initialize the sensor."""
+        super().__init__(thermostat, "current_temperature", "Current Temperature")
+
+    @property
+    def native_value(self):
+        """Return the current temperature."""
+        return self._thermostat._current_temperature
+
+
+class SalusTargetTemperatureSensor(SalusThermostatChildEntity, SensorEntity):
+    """Representation of a Salus Target Temperature Sensor."""
+
+    _attr_native_unit_of_measurement = UnitOfTemperature.CELSIUS
+    _attr_device_class = SensorDeviceClass.TEMPERATURE
+    _attr_entity_category = None
+
+    def __init__(self, thermostat):
+        """Initialize the sensor."""
+        super().__init__(thermostat, "target_temperature", "Target Temperature")
+
+    @property
+    def native_value(self):
+        """Return the target temperature."""
+        return self._thermostat._target_temperature
+
+
+class SalusCloudCadenceSensor(SalusThermostatChildEntity, SensorEntity):
+    """Estimated period between two refreshes of the device values in the cloud."""
+
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_device_class = SensorDeviceClass.DURATION
+    _unrecorded_attributes = frozenset({"next_refresh", "refresh_windows"})
+
+    def __init__(self, thermostat):
+        """Initialize the sensor."""
+        super().__init__(thermostat, "cloud_refresh_period", "Cloud Refresh Period")
+        self._attributes_cache = (None, None)
+
+    @property
+    def native_value(self):
+        """Return the estimated refresh period."""
+        period = self._thermostat.cadence.period
+        return round(period) if period is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Return the phase of the estimate, built once per poll."""
+        version, attributes = self._attributes_cache
+        if version != self._thermostat.snapshot_version:
+            cadence = self._thermostat.cadence
+            next_refresh = cadence.next_refresh(dt_util.utcnow().timestamp())
+            attributes = MappingProxyType(
+                {
+                    "next_refresh": (
+                        dt_util.utc_from_timestamp(next_refresh).isoformat()
+                        if next_refresh is not None
+                        else None
+                    ),
+                    "refresh_windows": cadence.window_count,
+                    "aligned": cadence.ready,
+                }
+            )
+            self._attributes_cache = (self._thermostat.snapshot_version, attributes)
+        return attributes
@@ -0,0 +1,17 @@
+"""Shared helpers of the tests."""
+import importlib.util
+import pathlib
+
+PACKAGE = pathlib.Path(__file__).parents[1] / "custom_components" / "salus_it500"
+
+
+def load_module(name):
+    """Load a module of the integration that does not depend on Home Assistant.
+
+    The module is loaded on its own, so the package __init__, which needs
+    Home Assistant, is not imported.
+    """
+    spec = importlib.util.spec_from_file_location(f"salus_it500_{name}", PACKAGE / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
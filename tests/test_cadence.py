@@ -0,0 +1,120 @@
+"""Tests of the cloud refresh cadence estimator."""
+import bisect
+import random
+import statistics
+
+from conftest import load_module
+
+cadence = load_module("cadence")
+
+INTERVAL = 60
+PHASE = 17.0
+
+
+def simulate(period, changing_share, hours=24, seed=1, lag=0.5):
+    """Poll a simulated cloud the way the thermostat does and return the statistics.
+
+    The cloud refreshes every `period` seconds, `lag` seconds late at most;
+    only `changing_share` of the refreshes change the values.
+    """
+    rnd = random.Random(seed)
+    end = hours * 3600
+    refresh_times, digests, digest = [], [], 0
+    refresh = PHASE
+    while refresh < end + 2 * period:
+        if rnd.random() < changing_share:
+            digest += 1
+        refresh_times.append(refresh + rnd.uniform(0, lag))
+        digests.append(digest)
+        refresh += period
+
+    estimator = cadence.CadenceEstimator()
+    polls, retries = [], 0
+    now = 0.0
+    while now < end:
+        latency = rnd.uniform(0.2, 1.0)
+        index = bisect.bisect_right(refresh_times, now + latency / 2) - 1
+        estimator.observe(now + latency, digests[index] if index >= 0 else -1)
+        polls.append(now)
+        delay = INTERVAL
+        if estimator.ready:
+            delay = estimator.poll_delay(now + latency, INTERVAL)
+            retries += delay == cadence.CADENCE_RETRY
+            delay += latency
+        now += delay
+
+    gaps = [b - a for a, b in zip(polls, polls[1:])]
+    return {
+        "period": estimator.period,
+        "mean_gap": statistics.mean(gaps),
+        "retry_share": retries / len(polls),
+    }
+
+
+def test_period_with_mostly_identical_refreshes():
+    """A long period is found although only a fifth of the refreshes change anything."""
+    for seed in range(1, 4):
+        result = simulate(300, 0.2, hours=48, seed=seed)
+        assert abs(result["period"] - 300) < 5
+        # The request budget holds
+        assert 55 < result["mean_gap"] < 75
+        assert result["retry_share"] < 0.01
+
+
+def test_half_changing_refreshes_keep_interval():
+    """Unchanged responses at the period of the interval neither halve the period nor add retries."""
+    for seed in range(1, 4):
+        result = simulate(60, 0.5, seed=seed)
+        assert abs(result["period"] - 60) < 2
+        assert result["mean_gap"] >= 59
+        assert result["retry_share"] == 0
+
+
+def test_retries_stay_within_budget():
+    """A refresh that always changes the values but arrives late is looked for again, sparingly."""
+    result = simulate(120, 1.0, seed=1, lag=10)
+    assert abs(result["period"] - 120) < 5
+    assert 0 < result["retry_share"] <= cadence.CADENCE_RETRY_SHARE
+
+
+def test_unchanged_poll_is_not_a_miss_when_refreshes_repeat_values():
+    """A poll after a refresh that returned identical values is not retried."""
+    estimator = cadence.CadenceEstimator()
+    estimator._planned_changes.extend([True, False, True, True, False, True, False, False])
+    estimator._planned_refresh = 100.0
+    estimator._last_poll = 40.0
+    estimator._last_digest = 1
+    estimator.observe(106.0, 1)
+    assert not estimator.every_refresh_changes
+    assert not estimator._missed
+
+
+def test_fraction_of_period_is_rejected():
+    """Gaps that are all even multiples of a candidate show it is half the period."""
+    gaps = [600, 1200, 1800, 2400]
+    assert cadence._fit_period(gaps, 300) is None
+    assert cadence._fit_period([600, 1200, 1800, 3000], 600) == 600
+
+
+def test_smallest_consistent_gap_wins_over_median():
+    """Multiples of the period dominating the gaps do not inflate the estimate."""
+    gaps = sorted([300, 600, 900, 900, 1200, 1500, 1500, 2100, 299, 301])
+    for candidate in gaps:
+        period = cadence._fit_period(gaps, candidate)
+        if period is not None:
+            break
+    assert abs(period - 300) < 2
+
+
+def test_change_caused_by_command_is_no_refresh_window():
+    """The change a command of ours causes does not become a refresh window."""
+    estimator = cadence.CadenceEstimator()
+    estimator.observe(0.0, 1)
+    estimator.observe(60.0, 2)
+    estimator.command_sent()
+    # Not shown yet by the first poll after the command
+    estimator.observe(120.0, 2)
+    estimator.observe(180.0, 3)
+    assert len(estimator._windows) == 1
+    estimator.observe(240.0, 4)
+    assert list(estimator._windows) == [(0.0, 60.0), (180.0, 240.0)]
@@ -0,0 +1,62 @@
+"""Tests of the redacted capture of the Salus cloud traffic."""
+from conftest import load_module
+
+capture = load_module("capture")
+
+TOKEN = "123-abcdef"
+EMAIL = "user@example.com"
+PASSWORD = "hunter2"
+SECRETS = (EMAIL, PASSWORD, TOKEN)
+
+
+def test_login_payload_is_redacted():
+    """The e-mail and password of the login form are hidden."""
+    buffer = capture.ResponseCapture()
+    payload = {"IDemail": EMAIL, "password": PASSWORD, "login": "Login", "keep_logged_in": "1"}
+    buffer.record("POST", "https://salus-it500.com/public/login.php", data=payload, status=200, body="")
+    entry = buffer.dump()[0]
+    assert entry["data"] == {
+        "IDemail": capture.REDACTED,
+        "password": capture.REDACTED,
+        "login": "Login",
+        "keep_logged_in": "1",
+    }
+    # The caller's payload is left alone
+    assert payload["password"] == PASSWORD
+
+
+def test_set_data_token_is_redacted():
+    """The token of a set.php command is hidden, the command fields are kept."""
+    buffer = capture.ResponseCapture()
+    data = {"token": TOKEN, "devId": "STA00001", "current_tempZ1_set": "1", "current_tempZ1": 21}
+    buffer.record("POST", "https://salus-it500.com/includes/set.php", data=data, status=200, body="1")
+    entry = buffer.dump()[0]
+    assert entry["data"]["token"] == capture.REDACTED
+    assert entry["data"]["current_tempZ1"] == 21
+    assert entry["data"]["devId"] == "STA00001"
+
+
+def test_control_page_token_input_is_redacted():
+    """The session token in the hidden input of control.php is hidden, even when not yet known."""
+    body = f'<form><input id="token" type="hidden" value="{TOKEN}" /><p>{EMAIL}</p></form>'
+    redacted = capture.redact_body(body, secrets=(EMAIL,))
+    assert TOKEN not in redacted
+    assert EMAIL not in redacted
+    assert f'<input id="token" type="hidden" value="{capture.REDACTED}" />' in redacted
+
+
+def test_long_body_is_truncated():
+    """Bodies are cut at MAX_BODY_LENGTH, after the secrets are hidden."""
+    body = TOKEN + "x" * (2 * capture.MAX_BODY_LENGTH)
+    redacted = capture.redact_body(body, SECRETS)
+    assert redacted.startswith(capture.REDACTED)
+    assert redacted.endswith("...(truncated)")
+    assert len(redacted) == capture.MAX_BODY_LENGTH + len("...(truncated)")
+
+
+def test_error_is_redacted():
+    """An exception repr quoting the request URL does not leak the token."""
+    buffer = capture.ResponseCapture()
+    error = f"ClientConnectorError('https://salus-it500.com/public/ajax_device_values.php?token={TOKEN}')"
+    buffer.record("GET", "https://salus-it500.com/public/ajax_device_values.php", error=error, secrets=SECRETS)
+    assert TOKEN not in buffer.dump()[0]["error"]
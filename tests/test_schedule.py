@@ -0,0 +1,57 @@
+"""Tests of the local mirror of the weekly program."""
+import datetime
+
+from conftest import load_module
+
+schedule = load_module("schedule")
+
+# A Monday
+MONDAY = datetime.datetime(2026, 10, 19)
+
+
+def test_step_seen_early_lands_on_its_slot():
+    """A step estimated just before its boundary is not put in the previous slot."""
+    mirror = schedule.ScheduleMirror()
+    mirror.learn(MONDAY.replace(hour=6, minute=59, second=30), 21.0)
+    mirror.learn(MONDAY.replace(hour=22, minute=3), 16.0)
+    assert mirror.as_list() == [[0, 7 * 60, 21.0], [0, 22 * 60, 16.0]]
+
+
+def test_step_near_midnight_moves_to_next_day():
+    """Rounding up past midnight picks the slot of the next weekday."""
+    mirror = schedule.ScheduleMirror()
+    mirror.learn(MONDAY.replace(hour=23, minute=57), 16.0)
+    assert mirror.as_list() == [[1, 0, 16.0]]
+
+
+def test_step_is_forgotten_after_repeated_misses():
+    """One missed step is kept; a second miss in a row drops it."""
+    mirror = schedule.ScheduleMirror([[0, 7 * 60, 21.0]])
+    start, end = MONDAY.replace(hour=6, minute=55), MONDAY.replace(hour=7, minute=5)
+    assert not mirror.forget_between(start, end)
+    assert mirror
+    week = datetime.timedelta(days=7)
+    assert mirror.forget_between(start + week, end + week)
+    assert not mirror
+
+
+def test_seen_step_resets_misses():
+    """A step that happens again starts counting its misses anew."""
+    mirror = schedule.ScheduleMirror([[0, 7 * 60, 21.0]])
+    start, end = MONDAY.replace(hour=6, minute=55), MONDAY.replace(hour=7, minute=5)
+    mirror.forget_between(start, end)
+    mirror.learn(MONDAY.replace(hour=7, minute=1), 21.0)
+    assert not mirror.forget_between(start, end)
+    assert mirror.setpoint_at(MONDAY.replace(hour=8)) == 21.0
+
+
+def test_predicted_step_keeps_its_slot():
+    """A predicted step seen by a poll long after it is not learned again at the midpoint."""
+    mirror = schedule.ScheduleMirror([[0, 7 * 60, 21.0]])
+    start, end = MONDAY.replace(hour=6, minute=46), MONDAY.replace(hour=7, minute=2)
+    mirror.forget_between(start, end)
+    assert mirror.confirm_between(start, end, 21.0)
+    assert mirror.as_list() == [[0, 7 * 60, 21.0]]
+    # The miss was cleared
+    assert not mirror.forget_between(start, end)
+    assert not mirror.confirm_between(start, end, 18.0)